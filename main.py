@@ -1,10 +1,9 @@
 # frontend/main.py
 import os
 import streamlit as st
-from PIL import Image
-from dotenv import load_dotenv
+from utils.startup import load_config, load_css, warm_up
 
-load_dotenv()  # Load environment variables from .env file
+load_config()  # Load environment variables from .env file (once per process)
 
 BASE_URL = os.getenv("BASE_URL", "http://localhost:8080")
 
@@ -15,21 +14,13 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Optional: define a function to load local CSS
-def load_css(file_name):
-    try:
-        with open(file_name) as f:
-            st.markdown(f"<style>{f.read()}</style>", unsafe_allow_html=True)
-    except FileNotFoundError:
-        pass
-
 load_css("assets/style.css")
+warm_up()
 
 # Sidebar logo
-try:
-    logo = Image.open("assets/logo.png")
-    st.sidebar.image(logo, width=150)
-except:
+if os.path.exists("assets/logo.png"):
+    st.sidebar.image("assets/logo.png", width=150)
+else:
     st.sidebar.write("Logo here")
 
 st.title("Bienvenido a MELIA: Evaluación Preventiva de manchas cutáneas 🩺")
@@ -1,13 +1,13 @@
 # frontend/0_Login.py
 import streamlit as st
-import requests
-import os
-from dotenv import load_dotenv
-
-load_dotenv()
-BASE_URL = os.getenv("BASE_URL", "http://localhost:8080")
+from utils import perf
+from utils.api_client import get_client, RequestException
+from utils.session import end_session
+from utils.startup import warm_up
 
 st.set_page_config(page_title="Login / Register", layout="wide")
+perf.start_rerun("0_Login")
+warm_up()
 
 if "access_token" not in st.session_state:
     st.session_state["access_token"] = None
@@ -18,6 +18,8 @@ if "role" not in st.session_state:
 if "show_success" not in st.session_state:
     st.session_state["show_success"] = False
 
+client = get_client()
+
 st.title("🔑 Iniciar Sesión / Registro")
 
 tab_login, tab_register = st.tabs(["Iniciar Sesión", "Registrarse"])
@@ -32,11 +34,7 @@ with tab_login:
             st.warning("Por favor, ingresa usuario y contraseña")
         else:
             try:
-                resp = requests.post(
-                    f"{BASE_URL}/login",
-                    json={"username": login_user, "password": login_pass},
-                    timeout=15
-                )
+                resp = client.login(login_user, login_pass)
                 if resp.status_code == 200:
                     data = resp.json()
                     st.session_state["access_token"] = data["access_token"]
@@ -46,7 +44,7 @@ with tab_login:
                     st.rerun()
                 else:
                     st.error(f"Error {resp.status_code}: {resp.json().get('detail', 'Credenciales inválidas')}")
-            except requests.RequestException as e:
+            except RequestException as e:
                 st.error(f"No se pudo conectar con el servidor: {e}")
 
 # Show success message if just logged in
@@ -64,16 +62,12 @@ with tab_register:
             st.warning("Por favor, completa todos los campos")
         else:
             try:
-                r = requests.post(
-                    f"{BASE_URL}/register",
-                    json={"username": reg_user, "password": reg_pass},
-                    timeout=15
-                )
+                r = client.register(reg_user, reg_pass)
                 if r.status_code == 200:
                     st.success("Registro exitoso. Ahora puedes iniciar sesión.")
                 else:
                     st.error(r.json().get("detail", "Error desconocido al registrarse."))
-            except requests.RequestException as e:
+            except RequestException as e:
                 st.error(f"No se pudo conectar con el servidor: {e}")
 
 st.markdown("---")
@@ -81,7 +75,9 @@ st.info("Si ya tienes una sesión iniciada, navega a otra página desde la barra
 
 if st.session_state["access_token"]:
     if st.button("Cerrar Sesión"):
-        st.session_state["access_token"] = None
-        st.session_state["logged_in_user"] = None
+        # Drop this user's cached history and images (memory and disk)
+        end_session(client, purge=True)
         st.session_state["show_success"] = False
         st.rerun()
+
+perf.render_panel()
@@ -1,36 +1,34 @@
 # frontend/pages/1_Upload_and_Segment.py
 import streamlit as st
-import requests
-from io import BytesIO
-from PIL import Image
 from datetime import datetime
-import base64
 from streamlit_js_eval import streamlit_js_eval
-from dotenv import load_dotenv
-import os
-
-load_dotenv()
-BASE_URL = os.getenv("BASE_URL", "http://localhost:8080")
+from utils import perf
+from utils.abcde import ABCDE_LABELS, abcde_features
+from utils.api_client import get_client
+from utils.image_cache import SEGMENTED
+from utils.dedup import DEDUP_MAX_DISTANCE, UserHashIndex, dhash, get_upload_index
+from utils.images import decode_b64_image
+from utils.inference import fallback_inference_client
+from utils.overlay import CLIENT_OVERLAY, overlay_from_bytes
+from utils.preprocess import normalize_image, format_bytes
+from utils.chunked_upload import chunked_upload
+from utils.uploads import upload_many
+from utils.session import require_login
+from utils.startup import load_css, warm_up
 
 st.set_page_config(
     page_title="Evaluación Inicial",
     layout="wide",
     initial_sidebar_state="auto"
 )
-
-def load_css(file_name):
-    try:
-        with open(file_name) as f:
-            st.markdown(f'<style>{f.read()}</style>', unsafe_allow_html=True)
-    except:
-        pass
+perf.start_rerun("1_Upload_and_Segment")
+warm_up()
 
 load_css("./assets/style.css")
 
-# Check if user is logged in
-if "access_token" not in st.session_state or not st.session_state["access_token"]:
-    st.warning("Necesitas iniciar sesión antes de subir imágenes.")
-    st.stop()
+# Check if user is logged in (renews the token when it is about to expire)
+client = get_client()
+token = require_login(client, "Necesitas iniciar sesión antes de subir imágenes.")
 
 st.title("🖼️ Evaluación Inicial de Manchas Cutáneas")
 st.markdown("""
@@ -41,7 +39,6 @@ Sin embargo, es una herramienta de apoyo para el seguimiento preventivo de manch
 La evaluación profesional es siempre necesaria para un correcto seguimiento de la salud cutánea.
 """)
 
-token = st.session_state["access_token"]
 username_state = st.session_state["logged_in_user"]
 
 col_left, col_right = st.columns(2)
@@ -80,7 +77,10 @@ with col_left:
 
 with col_right:
     st.subheader("Ubicación y Comentarios")
-    location = streamlit_js_eval(js_expressions="navigator.geolocation.getCurrentPosition", key="get_location")
+    # Ask the browser only until we have a position; later reruns reuse it
+    if not st.session_state.get("geolocation"):
+        st.session_state["geolocation"] = streamlit_js_eval(js_expressions="navigator.geolocation.getCurrentPosition", key="get_location")
+    location = st.session_state["geolocation"]
 
     geolocation_city = st.text_input("Ciudad (opcional)")
     geolocation_region = st.text_input("Región (opcional)")
@@ -98,100 +98,287 @@ with col_right:
         geolocation_lon = location.coords.longitude
 
 # File upload
-uploaded_file = st.file_uploader("Selecciona una imagen (JPG, PNG)", type=["jpg", "jpeg", "png"])
+uploaded_files = st.file_uploader(
+    "Selecciona una o varias imágenes (JPG, PNG)",
+    type=["jpg", "jpeg", "png"],
+    accept_multiple_files=True
+)
 
-if uploaded_file:
-    st.image(uploaded_file, caption="🖼️ Imagen original subida", use_container_width=True, clamp=True)
+@st.cache_data(show_spinner=False, max_entries=16)
+def prepare_upload(data: bytes, filename: str) -> dict:
+    """Normaliza la imagen una sola vez por archivo (cacheado entre reruns)."""
+    return normalize_image(data, filename)
+
+optimize_upload = st.checkbox(
+    "Optimizar imagen antes de subir",
+    value=True,
+    help="Corrige la orientación, reduce la resolución a la usada por el modelo y elimina metadatos (EXIF, GPS)."
+)
+skip_duplicates = st.checkbox(
+    "Omitir imágenes repetidas",
+    value=True,
+    help="Si una imagen es casi idéntica a otra ya subida, se muestra el resultado anterior sin volver a enviarla (no consume el límite diario)."
+)
+resumable_upload = st.checkbox(
+    "Subida por partes (conexión inestable)",
+    value=False,
+    help="Envía cada imagen en partes pequeñas; si la conexión se corta, al reintentar continúa desde la última parte recibida."
+)
 
-def delete_image(image_id: str, headers: dict) -> bool:
+def display_local_abcde(features: dict):
+    """Criterios ABCDE estimados localmente a partir de la máscara (mismas etiquetas que el análisis avanzado)"""
+    st.subheader("Criterios ABCDE (estimación inmediata)")
+    cols = st.columns(3)
+    for i, (field, label) in enumerate(ABCDE_LABELS):
+        with cols[min(i // 2, 2)]:
+            st.markdown(f"**{label}**: {features.get(field, 'N/A')}")
+    st.caption("Medidas geométricas calculadas localmente en la app a partir de la primera segmentación. "
+               "El análisis avanzado las revisará; no constituyen un diagnóstico.")
+
+def display_local_segmentation(name: str, result: dict):
+    """Segmentación hecha en la app cuando el backend no respondió; no se guarda en el historial."""
+    st.info(f"🔌 Sin conexión con el servidor: segmentación local orientativa de `{name}`. "
+            "La imagen no se guardó; vuelve a subirla más tarde.")
+    segmentation = result["local_segmentation"]
+    try:
+        overlay_img = overlay_from_bytes(None, result["source"], segmentation)
+    except Exception as e:
+        st.warning(f"No se pudo dibujar la segmentación de `{name}`: {e}")
+        overlay_img = None
+    if overlay_img is not None:
+        st.image(overlay_img, caption=f"🖌️ Segmentación local ({name})", use_container_width=True, clamp=True)
     try:
-        resp = requests.delete(
-            f"{BASE_URL}/delete_image/{image_id}",
-            headers=headers,
-            timeout=30
-        )
-        return resp.status_code == 200
-    except requests.RequestException:
-        return False
+        features = abcde_features(result["source"], segmentation)
+    except Exception:
+        features = None
+    if features:
+        display_local_abcde(features)
+
+def display_upload_result(key: str, result: dict):
+    """Muestra el resultado de una subida (clasificación inicial y overlay) o su error"""
+    name = result["name"]
+    if result.get("duplicate_in_selection"):
+        st.info(f"♻️ `{name}` es casi idéntica a `{result['duplicate_in_selection']}` en esta misma selección; no se envió.")
+    elif result["status_code"] == 200:
+        result_json = result["json"] or {}
+        if result.get("duplicate_of"):
+            st.info(f"♻️ `{name}` es casi idéntica a una imagen que ya subiste; se muestra su resultado sin volver a enviarla.")
+        else:
+            st.success(f"✅ ¡Imagen `{name}` procesada exitosamente!")
+
+        image_id = result_json.get("id")
+        col1, col2 = st.columns([0.9, 0.1])
+
+        with col1:
+            initial_evaluation = result_json.get("first_classification", "N/A")
+            st.markdown(f"""
+            **Evaluación inicial preliminar**: `{initial_evaluation}`
+
+            ⚠️ **Nota importante**: 
+            - Esta es una primera evaluación automatizada y preliminar
+            - Los resultados serán refinados en el análisis detallado
+            - Esta herramienta NO sustituye la evaluación profesional
+            - Consulte siempre con un profesional de la salud para una evaluación completa
+            """)
+            # add that The first segmentation is not final and could be wrong then another model will use that to enhance results
+            st.warning(f"La primera clasificación no es definitiva y puede ser incorrecta. Será usada y mejorada por otro modelo. ")
+
+        with col2:
+            if image_id and st.button("🗑️", key=f"delete_new_img_{key}_{image_id}", help="Delete this image"):
+                if st.warning("⚠️ Are you sure you want to delete this image?"):
+                    if client.delete_image(token, image_id):
+                        st.session_state["upload_results"].pop(key, None)
+                        st.success("Image deleted successfully!")
+                        st.rerun()
+                    else:
+                        st.error("Failed to delete image")
+
+        seg_b64 = result_json.get("segmented_image_b64", None)
+        overlay_img = None
+        if seg_b64:
+            # Cached so the pending/history pages reuse the decoded overlay
+            overlay_img = decode_b64_image(image_id, SEGMENTED, seg_b64)
+        elif result.get("source"):
+            # The backend skipped its overlay (include_overlay=false): draw it on the image we sent
+            try:
+                overlay_img = overlay_from_bytes(image_id, result["source"], result_json.get("segmentation_result"))
+            except Exception as e:
+                st.warning(f"No se pudo dibujar la segmentación de `{name}`: {e}")
+        if overlay_img is not None:
+            st.image(
+                overlay_img,
+                caption=f"🖌️ Imagen segmentada ({name})",
+                use_container_width=True,
+                clamp=True
+            )
+
+        if result.get("source"):
+            try:
+                features = abcde_features(result["source"], result_json.get("segmentation_result"))
+            except Exception:
+                features = None  # the estimate is a bonus; never block the upload result
+            if features:
+                display_local_abcde(features)
+    elif result["status_code"] == 400:
+        # Possibly daily limit or other validation; only this file is affected
+        detail = (result["json"] or {}).get("detail", "Error desconocido.")
+        st.error(f"❌ `{name}`: {detail}")
+    elif result["status_code"] is None:
+        st.error(f"❌ `{name}`: {result['error']}")
+        if result.get("local_segmentation"):
+            display_local_segmentation(name, result)
+    else:
+        st.error(f"❌ `{name}` - Error {result['status_code']}: {result['text']}")
+
+if "upload_results" not in st.session_state:
+    st.session_state["upload_results"] = {}
+
+# Per-file preview, size savings and body part
+FILE_BODY_PART_DEFAULT = "Usar la parte del cuerpo indicada arriba"
+file_body_part_options = [FILE_BODY_PART_DEFAULT] + [p for p in body_part_options if p not in ("Otra", "No especificar")]
+
+upload_items = []
+for uploaded_file in uploaded_files or []:
+    # Stable per file, so removing one file doesn't shift the others' widgets (fallback: name and size)
+    file_key = getattr(uploaded_file, "file_id", None) or f"{uploaded_file.name}_{uploaded_file.size}"
+    with st.container(border=True):
+        preview_col, info_col = st.columns([0.35, 0.65])
+        with preview_col:
+            st.image(uploaded_file, caption=f"🖼️ {uploaded_file.name}", use_container_width=True, clamp=True)
+        with info_col:
+            file_body_part = st.selectbox("Parte del cuerpo de esta imagen", file_body_part_options, key=f"body_part_{file_key}")
+            prepared = None
+            if optimize_upload:
+                try:
+                    prepared = prepare_upload(uploaded_file.getvalue(), uploaded_file.name)
+                    saved = 1 - prepared["bytes"] / max(prepared["original_bytes"], 1)
+                    st.caption(
+                        f"📉 Tamaño a enviar: {format_bytes(prepared['bytes'])} "
+                        f"(original {format_bytes(prepared['original_bytes'])}, ahorro {saved:.0%}) · "
+                        f"{prepared['size'][0]}×{prepared['size'][1]} px"
+                    )
+                except Exception as e:
+                    st.warning(f"No se pudo optimizar la imagen, se enviará el archivo original: {e}")
+    upload_items.append((file_key, uploaded_file, prepared, body_part if file_body_part == FILE_BODY_PART_DEFAULT else file_body_part))
 
 if st.button("🚀 Iniciar Evaluación Preliminar"):
     if not username_state:
         st.warning("⚠️ Usuario no definido.")
-    elif not uploaded_file:
+    elif not upload_items:
         st.warning("⚠️ Por favor, sube una imagen.")
     else:
-        files = {
-            "file": (uploaded_file.name, uploaded_file, uploaded_file.type)
-        }
-        data = {
-            "username": username_state,
-            "age": str(age) if age else "",
-            "body_part": body_part,
-            "diameter_larger_than_pencil": str(diameter_larger_than_pencil),
-            "geolocation_city": geolocation_city,
-            "geolocation_region": geolocation_region,
-            "geolocation_lat": geolocation_lat,
-            "geolocation_lon": geolocation_lon,
-            "additional_comment": additional_comment
-        }
-        if timestamp:
-            data["timestamp"] = timestamp.isoformat()
-
-        headers = {"Authorization": f"Bearer {token}"}
-
-        with st.spinner("Procesando..."):
+        requests_by_key = {}
+        for file_key, uploaded_file, prepared, file_body_part in upload_items:
+            if prepared:
+                files = {
+                    "file": (prepared["filename"], prepared["data"], prepared["mime"])
+                }
+            else:
+                files = {
+                    "file": (uploaded_file.name, uploaded_file.getvalue(), uploaded_file.type)
+                }
+            data = {
+                "username": username_state,
+                "age": str(age) if age else "",
+                "body_part": file_body_part,
+                "diameter_larger_than_pencil": str(diameter_larger_than_pencil),
+                "geolocation_city": geolocation_city,
+                "geolocation_region": geolocation_region,
+                "geolocation_lat": geolocation_lat,
+                "geolocation_lon": geolocation_lon,
+                "additional_comment": additional_comment
+            }
+            if timestamp:
+                data["timestamp"] = timestamp.isoformat()
+            if CLIENT_OVERLAY:
+                data["include_overlay"] = "false"
+            requests_by_key[file_key] = (files, data)
+
+        names = {file_key: uploaded_file.name for file_key, uploaded_file, _, _ in upload_items}
+        upload_index = get_upload_index()
+        owner = client.identity(token)
+
+        # Perceptual hash of every file; near-duplicates of earlier uploads are answered locally
+        hashes, known_results = {}, {}
+        selection = UserHashIndex()  # files of this selection already sent or answered from an earlier upload
+        for file_key, (files, _) in list(requests_by_key.items()):
             try:
-                resp = requests.post(f"{BASE_URL}/upload_image", files=files, data=data, headers=headers, timeout=60)
-                if resp.status_code == 200:
-                    result_json = resp.json()
-                    st.success("✅ ¡Imagen procesada exitosamente!")
-                    
-                    image_id = result_json.get("id")
-                    col1, col2 = st.columns([0.9, 0.1])
-                    
-                    with col1:
-                        initial_evaluation = result_json.get("first_classification", "N/A")
-                        st.markdown(f"""
-                        **Evaluación inicial preliminar**: `{initial_evaluation}`
-                        
-                        ⚠️ **Nota importante**: 
-                        - Esta es una primera evaluación automatizada y preliminar
-                        - Los resultados serán refinados en el análisis detallado
-                        - Esta herramienta NO sustituye la evaluación profesional
-                        - Consulte siempre con un profesional de la salud para una evaluación completa
-                        """)
-                        # add that The first segmentation is not final and could be wrong then another model will use that to enhance results
-                        st.warning(f"La primera clasificación no es definitiva y puede ser incorrecta. Será usada y mejorada por otro modelo. ")
-
-                    with col2:
-                        if st.button("🗑️", key=f"delete_new_img_{image_id}", help="Delete this image"):
-                            if st.warning("⚠️ Are you sure you want to delete this image?"):
-                                if delete_image(image_id, headers):
-                                    st.success("Image deleted successfully!")
-                                    st.rerun()
-                                else:
-                                    st.error("Failed to delete image")
-                    
-                    seg_result = result_json.get("segmentation_result", {})
-                    seg_b64 = result_json.get("segmented_image_b64", None)
-
-                    # with st.expander("🔍 Ver segmentación JSON", expanded=False):
-                    #     st.json(seg_result)
-
-                    if seg_b64:
-                        overlay_bytes = base64.b64decode(seg_b64)
-                        overlay_img = Image.open(BytesIO(overlay_bytes))
-                        st.image(
-                            overlay_img,
-                            caption="🖌️ Imagen segmentada",
-                            use_container_width=True,
-                            clamp=True
-                        )
-                elif resp.status_code == 400:
-                    # Possibly daily limit or other validation
-                    detail = resp.json().get("detail", "Error desconocido.")
-                    st.error(f"❌ {detail}")
-                else:
-                    st.error(f"❌ Error {resp.status_code}: {resp.text}")
-            except requests.RequestException as e:
-                st.error(f"❌ Error al conectar con el servidor: {e}")
+                with perf.timed("dhash"):
+                    hashes[file_key] = dhash(files["file"][1])
+            except Exception:
+                continue
+            if not skip_duplicates:
+                continue
+            repeated = selection.nearest(hashes[file_key], DEDUP_MAX_DISTANCE)
+            if repeated is not None:
+                known_results[file_key] = {"status_code": None, "json": None, "duplicate_in_selection": names[repeated[1]]}
+            else:
+                selection.add(hashes[file_key], file_key, None)
+                previous = upload_index.find(owner, hashes[file_key])
+                if previous is None:
+                    continue
+                _, image_id, result_json = previous
+                known_results[file_key] = {"status_code": 200, "json": result_json, "text": "", "duplicate_of": image_id}
+            known_results[file_key]["source"] = files["file"][1]
+            del requests_by_key[file_key]
+
+        def finish_upload(file_key: str, result: dict):
+            result["name"] = names[file_key]
+            if "source" not in result:
+                result["source"] = requests_by_key[file_key][0]["file"][1]  # bytes sent, for the local overlay
+            result_json = result.get("json") or {}
+            if result["status_code"] == 200 and result_json.get("id") and file_key in hashes and not result.get("duplicate_of"):
+                upload_index.add(owner, hashes[file_key], str(result_json["id"]), result_json)
+            st.session_state["upload_results"][file_key] = result
+            with slots[file_key].container(), perf.timed("render resultado"):
+                display_upload_result(file_key, result)
+
+        # One placeholder per file, filled as soon as its upload finishes
+        slots = {}
+        for file_key in requests_by_key:
+            slots[file_key] = st.empty()
+            slots[file_key].info(f"⏳ Subiendo `{names[file_key]}`...")
+        for file_key in known_results:
+            slots[file_key] = st.empty()
+
+        st.session_state["upload_results"] = {}
+        for file_key, result in known_results.items():
+            finish_upload(file_key, result)
+        if resumable_upload:
+            # One file at a time with its own byte-level progress bar
+            for file_key, (files, data) in requests_by_key.items():
+                filename, content, content_type = files["file"]
+                file_progress = slots[file_key].progress(0.0, text=f"Subiendo `{names[file_key]}`...")
+                for event in chunked_upload(client, token, username_state, filename, content, content_type, data):
+                    if event[0] == "progress":
+                        _, sent, total = event
+                        file_progress.progress(sent / max(total, 1), text=f"`{names[file_key]}`: {format_bytes(sent)} de {format_bytes(total)}")
+                    else:
+                        result = event[1]
+                finish_upload(file_key, result)
+        elif requests_by_key:  # empty when every file was answered from earlier uploads
+            progress = st.progress(0.0, text="Procesando...")
+            for done, (file_key, result) in enumerate(upload_many(client, token, requests_by_key), start=1):
+                finish_upload(file_key, result)
+                progress.progress(done / len(requests_by_key), text=f"{done} de {len(requests_by_key)} imágenes procesadas")
+
+        # Backend unreachable: segment those files here so the user still gets a first look
+        offline = {file_key: result["source"] for file_key, result in st.session_state["upload_results"].items()
+                   if result["status_code"] is None and result.get("error") and result.get("source")}
+        inference_client = fallback_inference_client() if offline else None
+        if inference_client is not None:
+            with st.spinner("Segmentando localmente..."):
+                for file_key, inferred in inference_client.infer_many(offline):
+                    if inferred["status"] != "ok":
+                        continue
+                    result = st.session_state["upload_results"][file_key]
+                    result["local_segmentation"] = inferred["prediction"]
+                    with slots[file_key].container():
+                        display_upload_result(file_key, result)
+else:
+    # Keep the last results visible across reruns (e.g. after pressing delete)
+    with perf.timed("render resultados"):
+        for file_key, result in list(st.session_state["upload_results"].items()):
+            display_upload_result(file_key, result)
+
+perf.render_panel()
@@ -1,40 +1,23 @@
 # frontend/pages/2_Advanced_Analysis_and_Listing.py
 import streamlit as st
-import requests
-import base64
-from io import BytesIO
-from PIL import Image
-from dotenv import load_dotenv
+import hashlib
 import os
+import time
 from datetime import datetime
-
-load_dotenv()
-BASE_URL = os.getenv("BASE_URL", "http://localhost:8080")
+from utils import perf
+from utils.api_client import get_client, RequestException, Timeout
+from utils.images import prefetch_segmented_images
+from utils.jobs import get_job_manager, BATCH_CONCURRENCY, QUEUED, RUNNING, DONE, FAILED, STATUS_LABELS
+from utils.session import require_login
+from utils.startup import load_css, warm_up
 
 st.set_page_config(page_title="Análisis Avanzado", layout="wide")
-
-def load_css(file_name):
-    try:
-        with open(file_name) as f:
-            st.markdown(f'<style>{f.read()}</style>', unsafe_allow_html=True)
-    except:
-        pass
+perf.start_rerun("2_Advanced_Analysis_and_Listing")
+warm_up()
 
 load_css("./assets/style.css")
 
 # --- No changes needed in these functions ---
-def delete_analysis(analysis_id: str, headers: dict) -> bool:
-    # ... (keep existing implementation)
-    try:
-        resp = requests.delete(
-            f"{BASE_URL}/delete_analysis/{analysis_id}",
-            headers=headers,
-            timeout=30
-        )
-        return resp.status_code == 200
-    except requests.RequestException:
-        return False
-
 def display_analysis_details(analysis):
     """Función para mostrar los detalles del análisis"""
     if not analysis or not isinstance(analysis, dict): # Added type check
@@ -84,45 +67,193 @@ def display_analysis_details(analysis):
     with cols[1]:
         st.markdown(f"**Observaciones Generales**: {analysis.get('final_explanation', 'N/A')}")
 
-def display_image(image_id):
-    """Función para mostrar la imagen segmentada"""
-    # ... (keep existing implementation)
-    try:
-        r_img = requests.get(
-            f"{BASE_URL}/get_segmented_image/{image_id}",
-            headers=headers,
-            timeout=30
-        )
-        if r_img.status_code == 200:
-            image_data = r_img.json()
-            seg_b64 = image_data.get("segmented_image_b64")
-            if seg_b64:
-                try:
-                    seg_img = Image.open(BytesIO(base64.b64decode(seg_b64)))
-                    st.image(seg_img, caption="Imagen Segmentada", use_container_width=True)
-                except Exception as e:
-                    st.error(f"Error decoding or displaying segmented image: {e}")
-            else:
-                st.info("No se encontró la imagen segmentada.")
-        elif r_img.status_code == 404:
-             st.info(f"Imagen segmentada para ID {image_id} no encontrada.")
-        else:
-            st.error(f"Error {r_img.status_code} al obtener imagen segmentada: {r_img.text}")
-    except requests.RequestException as e:
-        st.error(f"Error de red al obtener la imagen segmentada: {e}")
+def display_image(result):
+    """Función para mostrar la imagen segmentada ya descargada (ver utils.images)"""
+    if result["status"] == "ok":
+        st.image(result["image"], caption="Imagen Segmentada", use_container_width=True)
+    elif result["status"] == "missing":
+        st.info(result["message"])
+    else:
+        st.error(result["message"])
 # --- End of unchanged functions ---
 
+PENDING_PAGE_SIZES = [5, 10, 20, 50]
+JOBS_REFRESH_SECONDS = 2
+# Auto-refresh of the pending queue: cheap fragment tick, backend polled with adaptive backoff
+PENDING_TICK_SECONDS = 5
+PENDING_POLL_BASE_SECONDS = int(os.getenv("PENDING_POLL_BASE_SECONDS", "10"))
+PENDING_POLL_MAX_SECONDS = int(os.getenv("PENDING_POLL_MAX_SECONDS", "120"))
 
-if "access_token" not in st.session_state or not st.session_state["access_token"]:
-    st.warning("Necesitas iniciar sesión para acceder a esta página.")
-    st.stop()
 
-token = st.session_state["access_token"]
+def pending_ids_hash(pending_images) -> str:
+    """Huella del conjunto de ids pendientes (independiente del orden)"""
+    ids = sorted(str(img.get('id')) for img in pending_images)
+    return hashlib.sha1("\n".join(ids).encode()).hexdigest()
+
+def pending_watch():
+    """Sondea /pending_analysis sin rerun completo; solo rerenderiza la página si cambia el conjunto de ids"""
+    watch = st.session_state["pending_watch"]
+    now = time.time()
+    if now >= watch["next_poll_at"]:
+        try:
+            resp = client.pending_analysis(token, etag=watch.get("etag"))
+            if resp.status_code == 304:
+                changed = False
+            elif resp.status_code == 200:
+                watch["etag"] = resp.headers.get("ETag")
+                changed = pending_ids_hash(resp.json()) != st.session_state.get("pending_rendered_hash")
+            else:
+                raise RequestException(f"HTTP {resp.status_code}")
+            watch["errors"] = 0
+            if changed:
+                watch["interval"] = PENDING_POLL_BASE_SECONDS
+                watch["next_poll_at"] = now + watch["interval"]
+                st.rerun()
+            # Nothing new: wait longer before asking again
+            watch["interval"] = min(watch["interval"] * 2, PENDING_POLL_MAX_SECONDS)
+        except RequestException:
+            watch["errors"] += 1
+            watch["interval"] = min(PENDING_POLL_BASE_SECONDS * 2 ** watch["errors"], PENDING_POLL_MAX_SECONDS)
+        watch["next_poll_at"] = now + watch["interval"]
+    status = "⚠️ sin conexión, reintentando" if watch["errors"] else "🟢 actualización automática"
+    st.caption(f"{status} · próxima comprobación en {max(0, watch['next_poll_at'] - now):.0f} s")
+
+
+def extract_analysis_details(analysis_doc):
+    """Extrae el detalle anidado ('analysis') del documento devuelto por /start_process"""
+    if not isinstance(analysis_doc, dict):
+        return None
+    analysis = analysis_doc.get('analysis')
+    if isinstance(analysis, list) and analysis:
+        return analysis[0]
+    if isinstance(analysis, dict):
+        return analysis
+    return None
+
+def display_job_result(job):
+    """Muestra el resultado (o el error) de un trabajo de análisis terminado"""
+    result = job.result or {}
+    if job.status == DONE:
+        analysis_details = extract_analysis_details(result.get("doc"))
+        if analysis_details:
+            st.success("✅ Análisis completado")
+            display_analysis_details(analysis_details)
+        else:
+            st.error("Análisis completado, pero la estructura de detalles ('analysis') no se encontró en la respuesta.")
+            st.json(result.get("doc")) # Show raw response for debugging
+    elif job.status == FAILED:
+        status_code = result.get("status_code")
+        if status_code == 404:
+            st.error(f"Error 404: No se encontró el recurso para procesar ({job.label}). Verifique la API.")
+        elif status_code == 422:
+            st.error(f"Error 422: Datos inválidos enviados.")
+            if result.get("doc"):
+                st.json(result["doc"]) # Show validation errors if available
+            else:
+                st.text(result.get("text", ""))
+        else:
+            st.error(f"Error: {job.error}")
+        if st.button("🔁 Reintentar", key=f"retry_{job.id}"):
+            job_manager.retry(job.id, client, token)
+            st.rerun()
+
+def jobs_panel(scheduled_active: bool):
+    """Estado en vivo de los análisis lanzados en esta sesión (se refresca solo mientras haya trabajos activos)"""
+    jobs = [(key, job_manager.get(job_id)) for key, job_id in st.session_state["analysis_jobs"].items()]
+    jobs = [(key, job) for key, job in jobs if job is not None]
+    if not jobs:
+        return
+    if scheduled_active and not any(job.active for _, job in jobs):
+        st.rerun()  # everything finished: rerun once so the panel stops polling
+
+    st.subheader("Trabajos de análisis")
+    st.caption("Los análisis se ejecutan en segundo plano: puedes seguir navegando y volver más tarde.")
+    for key, job in jobs:
+        with st.expander(f"{STATUS_LABELS[job.status]} · {job.label} · {job.elapsed:.0f} s", expanded=not job.active):
+            if job.active:
+                st.info(f"{STATUS_LABELS[job.status]} desde hace {job.elapsed:.0f} s")
+            else:
+                display_job_result(job)
+                if st.button("Descartar", key=f"forget_{job.id}"):
+                    st.session_state["analysis_jobs"].pop(key, None)
+                    job_manager.forget(job.id)
+                    st.rerun()
+
+
+client = get_client()
+token = require_login(client)
 username_state = st.session_state.get("logged_in_user", "Unknown") # Use .get for safety
-headers = {"Authorization": f"Bearer {token}"}
+job_manager = get_job_manager()
+if "analysis_jobs" not in st.session_state:
+    st.session_state["analysis_jobs"] = {}
+if "batch_jobs" not in st.session_state:
+    st.session_state["batch_jobs"] = {}
 
 st.title("🔍 Análisis Avanzado")
 
+def batch_panel(scheduled_active: bool):
+    """Tabla de progreso del último lote de análisis (en cola, en proceso, completados, fallidos)"""
+    batch = [(img_id, job_manager.get(job_id)) for img_id, job_id in st.session_state["batch_jobs"].items()]
+    batch = [(img_id, job) for img_id, job in batch if job is not None]
+    if not batch:
+        st.session_state["batch_jobs"] = {}  # every job was pruned by the manager
+        return
+    st.markdown("**⚡ Lote de análisis**")
+    active = any(job.active for _, job in batch)
+    if scheduled_active and not active:
+        st.rerun()  # batch drained: rerun once so the pending list and polling update
+
+    counts = {status: sum(1 for _, job in batch if job.status == status) for status in (QUEUED, RUNNING, DONE, FAILED)}
+    finished = counts[DONE] + counts[FAILED]
+    st.progress(finished / len(batch), text=f"{finished} de {len(batch)} análisis terminados")
+    metric_cols = st.columns(4)
+    for col, status in zip(metric_cols, (QUEUED, RUNNING, DONE, FAILED)):
+        col.metric(STATUS_LABELS[status], counts[status])
+
+    st.dataframe(
+        [
+            {
+                "Imagen": img_id,
+                "Estado": STATUS_LABELS[job.status],
+                "Tiempo (s)": round(job.elapsed, 1),
+                "Intentos": job.attempts,
+                "Error": job.error or "",
+            }
+            for img_id, job in batch
+        ],
+        use_container_width=True,
+        hide_index=True,
+    )
+
+    if not active:
+        wall_time = max(job.finished_at for _, job in batch) - min(job.submitted_at for _, job in batch)
+        st.success(
+            f"Lote terminado en {wall_time:.0f} s: {counts[DONE]} completados, {counts[FAILED]} fallidos "
+            f"({len(batch) / max(wall_time, 1e-6) * 60:.1f} imágenes/min)."
+        )
+        action_cols = st.columns(2)
+        with action_cols[0]:
+            if counts[FAILED] and st.button("🔁 Reintentar fallidos", key="batch_retry_failed"):
+                job_manager.retry_batch([job.id for _, job in batch if job.status == FAILED], client, token)
+                st.rerun()
+        with action_cols[1]:
+            if st.button("Limpiar lote", key="batch_clear"):
+                for _, job in batch:
+                    job_manager.forget(job.id)
+                st.session_state["batch_jobs"] = {}
+                st.rerun()
+
+def job_for_image(img_id):
+    """Trabajo (individual o por lote) asociado a una imagen pendiente, si existe"""
+    job_id = st.session_state["analysis_jobs"].get(img_id) or st.session_state["batch_jobs"].get(img_id)
+    return job_manager.get(job_id) if job_id else None
+
+has_active_jobs = any(
+    job is not None and job.active
+    for job in map(job_manager.get, st.session_state["analysis_jobs"].values())
+)
+st.fragment(run_every=JOBS_REFRESH_SECONDS if has_active_jobs else None)(jobs_panel)(has_active_jobs)
+
 # Small ABCDE guidance
 with st.expander("¿Qué es la regla ABCDE?", expanded=False):
     st.markdown("""
@@ -139,21 +270,106 @@ tab1, tab2 = st.tabs(["📥 Imágenes Pendientes", "🔍 Análisis Manual"])
 with tab1:
     st.subheader("Imágenes Pendientes de Análisis")
 
-    if st.button("🔄 Actualizar lista", key="refresh_pending"):
-        st.rerun()
+    refresh_cols = st.columns([0.25, 0.75])
+    with refresh_cols[0]:
+        if st.button("🔄 Actualizar lista", key="refresh_pending"):
+            st.rerun()
+    with refresh_cols[1]:
+        auto_refresh = st.toggle("Actualizar automáticamente", value=False, key="pending_auto_refresh")
+    if auto_refresh:
+        if "pending_watch" not in st.session_state:
+            st.session_state["pending_watch"] = {"interval": PENDING_POLL_BASE_SECONDS, "errors": 0, "etag": None}
+        # A full rerun just fetched the list: the next poll can wait a full interval
+        st.session_state["pending_watch"]["next_poll_at"] = time.time() + PENDING_POLL_BASE_SECONDS
+        with refresh_cols[1]:
+            st.fragment(run_every=PENDING_TICK_SECONDS)(pending_watch)()
+
+    # Outside the pending list: a batch that analyses every pending image must still show its results
+    batch_running = any(
+        job is not None and job.active
+        for job in map(job_manager.get, st.session_state["batch_jobs"].values())
+    )
+    if st.session_state["batch_jobs"]:
+        st.fragment(run_every=JOBS_REFRESH_SECONDS if batch_running else None)(batch_panel)(batch_running)
 
     try:
-        pending_resp = requests.get(f"{BASE_URL}/pending_analysis", headers=headers, timeout=30)
-
-        if pending_resp.status_code == 200:
-            pending_images = pending_resp.json()
+        pending_resp = client.pending_analysis(token)
+        with perf.timed("parse pendientes"):
+            pending_ok = pending_resp.status_code == 200
+            pending_images = pending_resp.json() if pending_ok else None
+        if pending_ok:
+            # Baseline for the auto-refresh change detection
+            st.session_state["pending_rendered_hash"] = pending_ids_hash(pending_images)
+            if "pending_watch" in st.session_state:
+                st.session_state["pending_watch"]["etag"] = pending_resp.headers.get("ETag")
 
             if not pending_images:
                 st.info("No hay imágenes pendientes de análisis avanzado.")
             else:
-                st.write(f"Se encontraron {len(pending_images)} imágenes pendientes de análisis.")
-
-                for img in pending_images:
+                total_pending = len(pending_images)
+                st.write(f"Se encontraron {total_pending} imágenes pendientes de análisis.")
+
+                with st.expander("⚡ Analizar pendientes en lote", expanded=False):
+                    pending_by_id = {img['id']: img for img in pending_images if img.get('id')}
+                    batch_cols = st.columns([0.7, 0.3])
+                    with batch_cols[0]:
+                        batch_selection = st.multiselect(
+                            "Imágenes a analizar (vacío = todas)",
+                            options=list(pending_by_id),
+                            key="batch_selection",
+                        )
+                    with batch_cols[1]:
+                        batch_concurrency = st.slider(
+                            "Análisis simultáneos", min_value=1, max_value=8, value=BATCH_CONCURRENCY, key="batch_concurrency"
+                        )
+                    if st.button("⚡ Analizar en lote", key="batch_start", disabled=batch_running):
+                        selected_ids = batch_selection or list(pending_by_id)
+                        items = []
+                        for batch_img_id in selected_ids:
+                            batch_img = pending_by_id[batch_img_id]
+                            payload = {"username": username_state, "image_id": batch_img_id, "body_part": batch_img.get('body_part')}
+                            items.append((f"Imagen {batch_img_id}", {k: v for k, v in payload.items() if v is not None}))
+                        job_ids = job_manager.submit_batch(client, token, username_state, items, batch_concurrency)
+                        st.session_state["batch_jobs"] = dict(zip(selected_ids, job_ids))
+                        st.rerun()
+
+                # Paging: only the visible page is rendered and only its images are fetched
+                if "pending_page" not in st.session_state:
+                    st.session_state["pending_page"] = 0
+                if "pending_open_images" not in st.session_state:
+                    st.session_state["pending_open_images"] = set()
+
+                ctrl_cols = st.columns([0.25, 0.25, 0.5])
+                with ctrl_cols[0]:
+                    page_size = st.selectbox("Imágenes por página", PENDING_PAGE_SIZES, index=1, key="pending_page_size")
+                with ctrl_cols[1]:
+                    autoload_images = st.checkbox(
+                        "Cargar imágenes automáticamente",
+                        value=True,
+                        key="pending_autoload",
+                        help="Si se desactiva, cada imagen se descarga solo al pulsar 'Ver imagen'."
+                    )
+                total_pages = max(1, -(-total_pending // page_size))
+                page = min(st.session_state["pending_page"], total_pages - 1)
+
+                nav_cols = st.columns([0.15, 0.7, 0.15])
+                with nav_cols[0]:
+                    if st.button("⬅️ Anterior", key="pending_prev", disabled=page == 0):
+                        st.session_state["pending_page"] = page - 1
+                        st.rerun()
+                with nav_cols[1]:
+                    first = page * page_size
+                    last = min(first + page_size, total_pending)
+                    st.markdown(f"Página **{page + 1}** de **{total_pages}** · mostrando {first + 1}–{last} de {total_pending}")
+                with nav_cols[2]:
+                    if st.button("Siguiente ➡️", key="pending_next", disabled=page >= total_pages - 1):
+                        st.session_state["pending_page"] = page + 1
+                        st.rerun()
+                st.session_state["pending_page"] = page
+
+                # Placeholders filled once the concurrent image prefetch below completes
+                image_slots = {}
+                for img in pending_images[first:last]:
                     img_id = img.get('id', 'N/A')
                     timestamp_str = img.get('timestamp', 'N/A')
                     try:
@@ -175,18 +391,24 @@ with tab1:
                             - **Primera clasificación**: {img.get('first_classification', 'No disponible')}
                             """)
                             if img_id != 'N/A':
-                                display_image(img_id)
+                                open_images = st.session_state["pending_open_images"]
+                                if autoload_images or img_id in open_images:
+                                    image_slots[img_id] = st.empty()
+                                    image_slots[img_id].caption("⏳ Cargando imagen segmentada...")
+                                elif st.button("🖼️ Ver imagen", key=f"show_img_{img_id}"):
+                                    open_images.add(img_id)
+                                    st.rerun()
                             else:
                                 st.warning("ID de imagen no disponible.")
 
                         with cols[1]:
                             if img_id != 'N/A': # Only show button if ID exists
-                                if st.button("🔍 Analizar", key=f"analyze_{img_id}"):
-                                    # ----- MODIFICATION START -----
+                                job = job_for_image(img_id)
+                                if job and job.active:
+                                    st.info(f"{STATUS_LABELS[job.status]} ({job.elapsed:.0f} s)")
+                                elif st.button("🔍 Analizar", key=f"analyze_{img_id}"):
                                     # We need to tell the backend WHICH image to process.
                                     # Assuming the backend /start_process can take an image_id
-                                    # If not, the backend API needs modification.
-                                    # Let's *assume* it can take `image_id` in the payload for now.
                                     payload = {
                                         "username": username_state, # Or maybe fetch from img['username'] if available?
                                         "image_id": img_id,
@@ -195,63 +417,27 @@ with tab1:
                                     # Remove None values from payload if API doesn't like them
                                     payload = {k: v for k, v in payload.items() if v is not None}
 
-                                    with st.spinner(f"Realizando análisis avanzado para imagen {img_id}..."):
-                                        try:
-                                            adv_resp = requests.post(
-                                                f"{BASE_URL}/start_process",
-                                                json=payload,
-                                                headers=headers,
-                                                timeout=120 # Increased timeout for potentially long analysis
-                                            )
-
-                                            if adv_resp.status_code == 200:
-                                                analysis_doc = adv_resp.json() # This is the full document
-
-                                                # Extract the nested analysis details
-                                                analysis_details = None
-                                                if 'analysis' in analysis_doc:
-                                                    if isinstance(analysis_doc['analysis'], list) and analysis_doc['analysis']:
-                                                        analysis_details = analysis_doc['analysis'][0]
-                                                    elif isinstance(analysis_doc['analysis'], dict):
-                                                         analysis_details = analysis_doc['analysis']
-
-                                                # Display using the extracted details
-                                                if analysis_details:
-                                                     st.success("✅ Análisis completado")
-                                                     display_analysis_details(analysis_details)
-                                                     # Add a button to refresh the list *after* showing results
-                                                     if st.button("Ocultar resultado y actualizar lista", key=f"refresh_after_{img_id}"):
-                                                         st.rerun()
-                                                else:
-                                                     st.error("Análisis completado, pero la estructura de detalles ('analysis') no se encontró en la respuesta.")
-                                                     st.json(analysis_doc) # Show raw response for debugging
-
-                                            elif adv_resp.status_code == 404:
-                                                st.error(f"Error 404: No se encontró el recurso para procesar (Imagen ID: {img_id}?). Verifique la API.")
-                                            elif adv_resp.status_code == 422:
-                                                st.error(f"Error 422: Datos inválidos enviados.")
-                                                try:
-                                                    st.json(adv_resp.json()) # Show validation errors if available
-                                                except:
-                                                    st.text(adv_resp.text)
-                                            else:
-                                                st.error(f"Error {adv_resp.status_code}: {adv_resp.text}")
-                                        except requests.Timeout:
-                                             st.error("Error: La solicitud de análisis tardó demasiado tiempo (timeout).")
-                                        except requests.RequestException as e:
-                                            st.error(f"Error de conexión durante el análisis: {e}")
-                                    # ----- MODIFICATION END -----
+                                    # Runs in the background; results show up in "Trabajos de análisis"
+                                    st.session_state["analysis_jobs"][img_id] = job_manager.submit(
+                                        client, token, username_state, f"Imagen {img_id}", payload
+                                    )
+                                    st.rerun()
                             else:
                                 st.write("Análisis no disponible (ID inválido).")
 
+                # Fetch every segmented image at once and render each as soon as it arrives
+                for img_id, result in prefetch_segmented_images(client, token, image_slots.keys()):
+                    with image_slots[img_id].container(), perf.timed("render imagen"):
+                        display_image(result)
+
         elif pending_resp.status_code == 401:
             st.error("Error 401: No autorizado. Verifique su inicio de sesión.")
         else:
             st.error(f"Error al obtener imágenes pendientes: {pending_resp.status_code} - {pending_resp.text}")
 
-    except requests.Timeout:
+    except Timeout:
         st.error("Error: La solicitud para obtener imágenes pendientes tardó demasiado (timeout).")
-    except requests.RequestException as e:
+    except RequestException as e:
         st.error(f"Error de conexión al obtener imágenes pendientes: {e}")
 
 
@@ -297,51 +483,14 @@ with tab2:
             if selected_body_part_filter != "No especificar":
                 payload["body_part"] = selected_body_part_filter
 
-            with st.spinner(f"Iniciando análisis manual para {adv_username}..."):
-                try:
-                    adv_resp = requests.post(
-                        f"{BASE_URL}/start_process",
-                        json=payload,
-                        headers=headers,
-                        timeout=120 # Increased timeout
-                    )
-
-                    # ----- MODIFICATION START -----
-                    if adv_resp.status_code == 200:
-                        analysis_doc = adv_resp.json() # Full document
-
-                        # Extract nested details
-                        analysis_details = None
-                        if 'analysis' in analysis_doc:
-                           if isinstance(analysis_doc['analysis'], list) and analysis_doc['analysis']:
-                               analysis_details = analysis_doc['analysis'][0]
-                           elif isinstance(analysis_doc['analysis'], dict):
-                                analysis_details = analysis_doc['analysis']
-
-                        # Display using extracted details
-                        if analysis_details:
-                            st.success("✅ ¡Análisis avanzado completado!")
-                            display_analysis_details(analysis_details)
-                        else:
-                            st.error("Análisis completado, pero la estructura de detalles ('analysis') no se encontró en la respuesta.")
-                            st.json(analysis_doc) # Show raw response for debugging
-
-                    elif adv_resp.status_code == 404:
-                         st.error(f"Error 404: No se encontró imagen reciente para {adv_username}" + (f" en {selected_body_part_filter}" if selected_body_part_filter != "No especificar" else "") + ". O el endpoint no existe.")
-                    elif adv_resp.status_code == 422:
-                         st.error(f"Error 422: Datos inválidos enviados.")
-                         try:
-                             st.json(adv_resp.json())
-                         except:
-                             st.text(adv_resp.text)
-                    else:
-                        st.error(f"Error {adv_resp.status_code}: {adv_resp.text}")
-                    # ----- MODIFICATION END -----
-
-                except requests.Timeout:
-                    st.error("Error: La solicitud de análisis tardó demasiado tiempo (timeout).")
-                except requests.RequestException as e:
-                    st.error(f"Error de conexión durante el análisis manual: {e}")
+            label = f"Análisis manual de {adv_username}"
+            if selected_body_part_filter != "No especificar":
+                label += f" ({selected_body_part_filter})"
+            job_id = job_manager.submit(client, token, username_state, label, payload)
+            st.session_state["analysis_jobs"][f"manual:{job_id}"] = job_id
+            st.rerun()
 
 st.markdown("---")
 st.info("Si deseas ver todas tus imágenes y resultados, revisa la página de Historial.")
+
+perf.render_panel()
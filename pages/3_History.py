@@ -1,18 +1,16 @@
 # frontend/pages/3_History.py
 import streamlit as st
-import requests
-import base64
-from io import BytesIO
-from PIL import Image
-import pandas as pd
 from datetime import datetime, timedelta
-import plotly.express as px
-import os
-from dotenv import load_dotenv
-
-# Load environment variables
-load_dotenv()
-BASE_URL = os.getenv("BASE_URL", "http://localhost:8080")
+from utils import perf
+from utils.analysis_frame import ALL_BODY_PARTS, build_frame, filter_frame, first_analysis, summary_metrics
+from utils.api_client import get_client, RequestException
+from utils.image_cache import ORIGINAL, SEGMENTED
+from utils.evolution import evolution_label, lesion_tracks
+from utils.images import decode_b64_image, prefetch_images
+from utils.overlay import CLIENT_OVERLAY, has_geometry, overlay_from_image
+from utils.session import active_token
+from utils.startup import warm_up
+from utils.timeline_chart import timeline_figure
 
 # Configure page
 st.set_page_config(
@@ -20,6 +18,8 @@ st.set_page_config(
     page_icon="📋",
     layout="wide"
 )
+perf.start_rerun("3_History")
+warm_up()
 
 def format_date(date_str):
     try:
@@ -29,7 +29,7 @@ def format_date(date_str):
         return date_str
 
 def create_metrics_card(analysis_doc):
-    analysis_item = analysis_doc["analysis"][0] if analysis_doc.get("analysis") else {}
+    analysis_item = first_analysis(analysis_doc.get("analysis"))
     
     cols = st.columns(3)
     with cols[0]:
@@ -48,7 +48,7 @@ def create_metrics_card(analysis_doc):
                 confidence = 'N/A'
         st.metric("Confidence Level", confidence)
 
-def display_analysis_details(item, headers):
+def display_analysis_details(item):
     # ABCDE criteria
     st.subheader("Criterios ABCDE")
     cols = st.columns(3)
@@ -86,68 +86,62 @@ def display_analysis_details(item, headers):
         st.markdown(f"**Explicación General**:  **{item.get('final_explanation', '')}**")
 
 def display_image_with_controls(image_id: str
-, original_b64: str, segmented_b64: str, headers: dict):
-    """Display image with delete controls"""
-
+, original_b64: str, segmented_b64: str, token: str, segmentation=None):
+    """Display image with delete controls.
 
+    Images come inline only from older backends; otherwise they are fetched by id
+    once the user asks to see them. With segmentation geometry only the original is
+    downloaded and the overlay is drawn locally.
+    """
     col1, col2, col3 = st.columns([0.3, 0.3, 0.4])
-    
-    with col1:
-        if original_b64:
-            try:
-                st.image(
-                    base64.b64decode(original_b64),
-                    caption="Imagen Original",
-                    use_container_width=True,
-                    width=200
-                )
-            except Exception:
-                st.error("Error displaying original image")
-    
-    with col2:
-        if segmented_b64:
+
+    images = {}
+    if original_b64 or segmented_b64:
+        for variant, b64_data in ((ORIGINAL, original_b64), (SEGMENTED, segmented_b64)):
+            if b64_data:
+                try:
+                    images[variant] = {"status": "ok", "image": decode_b64_image(image_id, variant, b64_data)}
+                except Exception:
+                    images[variant] = {"status": "error", "message": f"Error displaying {variant} image"}
+    elif image_id in st.session_state["history_open_images"]:
+        local_overlay = CLIENT_OVERLAY and has_geometry(segmentation)
+        keys = [(image_id, ORIGINAL)] if local_overlay else [(image_id, ORIGINAL), (image_id, SEGMENTED)]
+        images = {variant: result for (_, variant), result in prefetch_images(get_client(), token, keys)}
+        if local_overlay and images[ORIGINAL]["status"] == "ok":
             try:
-                st.image(
-                    base64.b64decode(segmented_b64),
-                    caption="Imagen Segmentada",
-                    use_container_width=True,
-                    width=200
-                )
-            except Exception:
-                st.error("Error displaying segmented image")
-    
+                images[SEGMENTED] = {"status": "ok", "image": overlay_from_image(image_id, images[ORIGINAL]["image"], segmentation)}
+            except Exception as e:
+                images[SEGMENTED] = {"status": "error", "message": f"Error drawing segmented image: {e}"}
+    else:
+        with col1:
+            if st.button("🖼️ Ver imágenes", key=f"show_imgs_{image_id}"):
+                st.session_state["history_open_images"].add(image_id)
+                st.rerun()
+
+    for col, variant, caption in ((col1, ORIGINAL, "Imagen Original"), (col2, SEGMENTED, "Imagen Segmentada")):
+        result = images.get(variant)
+        if result is None:
+            continue
+        with col:
+            if result["status"] == "ok":
+                st.image(result["image"], caption=caption, use_container_width=True, width=200)
+            elif result["status"] == "missing":
+                st.info(result["message"])
+            else:
+                st.error(result["message"])
+
     with col3:
         st.markdown("&nbsp;")
         if st.button("🗑️", key=f"delete_img_{image_id}", help="Delete this image"):
             if st.warning("⚠️ Warning: Deleting this image will also remove all related analyses. Are you sure?"):
-                if delete_image(image_id, headers):
+                if get_client().delete_image(token, image_id):
                     st.success("Image deleted successfully!")
                     st.rerun()
                 else:
                     st.error("Failed to delete image")
 
-def delete_analysis(analysis_id: str, headers: dict) -> bool:
-    try:
-        resp = requests.delete(
-            f"{BASE_URL}/delete_analysis/{analysis_id}",
-            headers=headers,
-            timeout=30
-        )
-        return resp.status_code == 200
-    except requests.RequestException:
-        return False
-
-def delete_image(image_id: str, headers: dict) -> bool:
-    try:
-        resp = requests.delete(
-            f"{BASE_URL}/delete_image/{image_id}",
-            headers=headers,
-            timeout=30
-        )
-        return resp.status_code == 200
-    except requests.RequestException:
-        return False
 body_part_options = [
+        ALL_BODY_PARTS,
         "Brazo izquierdo",
         "Brazo derecho",
         "Tórax",
@@ -158,12 +152,49 @@ body_part_options = [
         "Cabeza/Cara",
         "Otra",
         "No especificar",
-        ""
     ]
+
+def render_lesion_evolution(analyses, body_part):
+    """Una fila por lesión con su tendencia de área (sparkline) y el resumen del criterio E"""
+    tracks = [t for t in lesion_tracks(analyses)
+              if len(t["points"]) > 1 and (body_part == ALL_BODY_PARTS or t["body_part"] == body_part)]
+    if not tracks:
+        return
+    st.subheader("Evolución por lesión")
+    rows = [{
+        "Parte del Cuerpo": t["body_part"] or "Sin especificar",
+        "Imágenes": len(t["points"]),
+        "Desde": t["points"][0]["date"].date(),
+        "Hasta": t["points"][-1]["date"].date(),
+        "Área relativa": [p["area_fraction"] / t["points"][0]["area_fraction"] for p in t["points"]],
+        "Evolución": evolution_label(t),
+    } for t in tracks]
+    st.dataframe(
+        rows,
+        hide_index=True,
+        use_container_width=True,
+        column_config={"Área relativa": st.column_config.LineChartColumn("Tendencia del área", y_min=0)},
+    )
+    st.caption("Áreas relativas a la primera imagen de cada lesión: son comparables si las fotos se toman a una distancia similar. "
+               "El cambio de color se incluye cuando las imágenes originales ya se han abierto.")
+
+def get_history_frame(analyses):
+    """DataFrame columnar del historial, reconstruido solo cuando cambia la respuesta cacheada"""
+    if st.session_state.get("history_frame_source") is not analyses:
+        with perf.timed("DataFrame historial"):
+            st.session_state["history_frame"] = build_frame(analyses)
+        st.session_state["history_frame_source"] = analyses
+    return st.session_state["history_frame"]
+
 def main():
     # Check authentication
-    if "access_token" not in st.session_state or not st.session_state["access_token"]:
-        st.warning("Please log in to access this page.")
+    # Renews the token when it is about to expire; cached history stays keyed by user
+    token = active_token(get_client())
+    if token is None:
+        if st.session_state.pop("session_expired", False):
+            st.warning("Tu sesión expiró. Vuelve a iniciar sesión; tus datos en caché se conservan.")
+        else:
+            st.warning("Please log in to access this page.")
         return
 
     st.title("📋 Historial de Evaluaciones Preventivas")
@@ -181,94 +212,84 @@ def main():
         end_date = st.date_input("Fecha Fin", value=datetime.now())
     with col3:
         body_part = st.selectbox("Parte del Cuerpo", body_part_options)
+    if body_part == "No especificar":
+        body_part = ""  # stored that way by the upload page
 
-    headers = {"Authorization": f"Bearer {st.session_state['access_token']}"}
+    # The whole (metadata-only) history is fetched once; date and body-part filters run locally
     params = {
-        "start_date": start_date.isoformat(),
-        "end_date": end_date.isoformat(),
-        "body_part": body_part if body_part != "Todas" else None
+        # Metadata only: images are requested by id when a card is opened
+        "include_images": "false"
     }
+    if "history_open_images" not in st.session_state:
+        st.session_state["history_open_images"] = set()
+    # Results are cached per user; deletes, uploads and analyses invalidate them
+    refresh = st.button("🔄 Actualizar historial", key="refresh_history")
 
     try:
         with st.spinner("Cargando historial..."):
-            resp = requests.get(f"{BASE_URL}/list_analyses", headers=headers, params=params, timeout=30)
-            
-            if resp.status_code == 200:
-                analyses = resp.json()
-                if not analyses:
+            analyses, error = get_client().list_analyses_cached(token, params, refresh=refresh)
+
+            if error is None:
+                frame = filter_frame(get_history_frame(analyses), start_date, end_date, body_part)
+                if frame.empty:
                     st.info("No hay análisis disponibles para este período.")
                     return
 
-                # Métricas de Resumen
-                total_analyses = len(analyses)
-                #Count 1 if his malignant and confidence > 0.75
-                high_risk = sum(1 for r in analyses if 'malignant' in r.get('analysis', {}).get('advance_classification', '').lower() and r.get('analysis', {}).get('confidence_level', 0) > 0.75)
+                # Métricas de Resumen (vectorizadas sobre el DataFrame filtrado)
+                metrics = summary_metrics(frame)
 
                 # Mostrar métricas de resumen
                 metrics_cols = st.columns(4)
                 with metrics_cols[0]:
-                    st.metric("Total Análisis", total_analyses)
+                    st.metric("Total Análisis", metrics["total"])
                 with metrics_cols[1]:
-                    st.metric("Casos Alto Riesgo", high_risk)
+                    st.metric("Casos Alto Riesgo", metrics["high_risk"])
                 with metrics_cols[2]:
-                    st.metric("Tasa de Riesgo", f"{(high_risk/total_analyses)*100:.1f}%")
+                    st.metric("Tasa de Riesgo", f"{metrics['risk_rate']*100:.1f}%")
                 with metrics_cols[3]:
-                    unique_parts = len(set(a.get('body_part', '') for a in analyses))
-                    st.metric("Partes del Cuerpo", unique_parts)
+                    st.metric("Partes del Cuerpo", metrics["body_parts"])
 
-                # Visualización de línea temporal
-                timeline_data = pd.DataFrame([
-                    {
-                        'date': datetime.fromisoformat(a['analysis_date']),
-                        'risk_level': a.get('analysis', {}).get('advance_classification', 'unknown'),
-                        'confidence': a.get('analysis', {}).get('confidence_level', 0),
-                        'body_part': a.get('body_part', 'desconocida')
-                    } for a in analyses
-                ])
-                
                 # Gráfico de evolución temporal
-                fig = px.scatter(timeline_data, 
-                               x='date', 
-                               y='confidence',
-                               color='risk_level',
-                               symbol='body_part',
-                               title="Evolución Temporal de Análisis",
-                               labels={
-                                   'date': 'Fecha de Análisis', 
-                                   'confidence': 'Nivel de Confianza',
-                                   'risk_level': 'Nivel de Riesgo',
-                                   'body_part': 'Parte del Cuerpo'
-                               })
-                st.plotly_chart(fig, use_container_width=True)
+                fig = timeline_figure(frame)
+                with perf.timed("render gráfico"):
+                    st.plotly_chart(fig, use_container_width=True)
+
+                # Evolución por lesión: whole history of the selected body part, not just the date range
+                with perf.timed("render evolución"):
+                    render_lesion_evolution(analyses, body_part)
 
                 # Mostrar análisis individuales
-                for analysis_doc in analyses:
-                    with st.expander(f"Análisis del {analysis_doc['analysis_date'][:10]} - {analysis_doc['body_part']}", expanded=False):
-                        cols = st.columns(2)
-                        with cols[0]:
-                            st.markdown(f"**Fecha**: {format_date(analysis_doc['analysis_date'])}")
-                            st.markdown(f"**Parte del Cuerpo**: {analysis_doc['body_part']}")
-                        with cols[1]:
-                            # Green if benign, red if malignant, yellow if other
-                            color = "green" if analysis_doc.get('analysis', {}).get('advance_classification', '').lower() == 'benign' else "red" if analysis_doc.get('analysis', {}).get('advance_classification', '').lower() == 'malignant' else "yellow"
-                            st.markdown(f"**Recomendación General**:  <span style='color:{color}'>{analysis_doc.get('overall_recommendation', '')}</span>", unsafe_allow_html=True)
+                with perf.timed("render tarjetas"):
+                    for row, classification in zip(frame["row"], frame["classification"]):
+                        analysis_doc = analyses[row]
+                        with st.expander(f"Análisis del {analysis_doc['analysis_date'][:10]} - {analysis_doc['body_part']}", expanded=False):
+                            cols = st.columns(2)
+                            with cols[0]:
+                                st.markdown(f"**Fecha**: {format_date(analysis_doc['analysis_date'])}")
+                                st.markdown(f"**Parte del Cuerpo**: {analysis_doc['body_part']}")
+                            with cols[1]:
+                                # Green if benign, red if malignant, yellow if other
+                                color = "green" if classification == 'benign' else "red" if classification == 'malignant' else "yellow"
+                                st.markdown(f"**Recomendación General**:  <span style='color:{color}'>{analysis_doc.get('overall_recommendation', '')}</span>", unsafe_allow_html=True)
 
-                        display_analysis_details(analysis_doc['analysis'], headers)
+                            display_analysis_details(first_analysis(analysis_doc.get('analysis')))
                         
-                        # Add this section to display images
-                        if 'image_id' in analysis_doc:
-                            display_image_with_controls(
-                                image_id=analysis_doc.get('image_id', ''),
-                                original_b64=analysis_doc.get('image_b64', ''),
-                                segmented_b64=analysis_doc.get('segmented_image_b64', ''),
-                                headers=headers
-                            )
+                            # Add this section to display images
+                            if 'image_id' in analysis_doc:
+                                display_image_with_controls(
+                                    image_id=analysis_doc.get('image_id', ''),
+                                    original_b64=analysis_doc.get('image_b64', ''),
+                                    segmented_b64=analysis_doc.get('segmented_image_b64', ''),
+                                    token=token,
+                                    segmentation=analysis_doc.get('segmentation_result')
+                                )
 
             else:
-                st.error(f"Error {resp.status_code}: {resp.text}")
+                st.error(error)
 
-    except requests.RequestException as e:
+    except RequestException as e:
         st.error(f"Error fetching analysis list: {e}")
 
 if __name__ == "__main__":
     main()
+    perf.render_panel()
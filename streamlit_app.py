@@ -1,14 +1,15 @@
 import streamlit as st
-import requests
 import json
 import base64
 from io import BytesIO
 from PIL import Image
+from utils.api_client import get_client, RequestException
+
+st.set_page_config(page_title="Evaluación Preventiva de manchas", layout="wide")
 
 # Replace with your FastAPI server base URL
 BASE_URL = "http://127.0.0.1:800"
-
-st.set_page_config(page_title="Evaluación Preventiva de manchas", layout="wide")
+client = get_client(BASE_URL)
 
 st.title("Evaluación Preventiva: Análisis y Seguimiento")
 
@@ -42,7 +43,7 @@ with col1:
                 data["timestamp"] = timestamp
 
             try:
-                resp = requests.post(f"{BASE_URL}/upload_image", files=files, data=data, timeout=60)
+                resp = client.upload_image(None, files, data)
                 if resp.status_code == 200:
                     result_json = resp.json()
                     st.success("Image processed successfully!")
@@ -62,7 +63,7 @@ with col1:
                 else:
                     st.error(f"Error {resp.status_code}: {resp.text}")
 
-            except requests.RequestException as e:
+            except RequestException as e:
                 st.error(f"Error connecting to server: {e}")
 
 with col2:
@@ -77,14 +78,14 @@ with col2:
             st.warning("Username required for analysis.")
         else:
             try:
-                adv_resp = requests.post(f"{BASE_URL}/start_process", json={"username": adv_username}, timeout=60)
+                adv_resp = client.start_process(None, {"username": adv_username})
                 if adv_resp.status_code == 200:
                     adv_data = adv_resp.json()
                     st.success("Advanced analysis completed.")
                     st.json(adv_data)
                 else:
                     st.error(f"Error {adv_resp.status_code}: {adv_resp.text}")
-            except requests.RequestException as e:
+            except RequestException as e:
                 st.error(f"Error connecting to server: {e}")
 
 st.markdown("---")
@@ -92,11 +93,11 @@ st.markdown("---")
 st.subheader("Lista de Usuarios con Imágenes")
 if st.button("Fetch All"):
     try:
-        list_resp = requests.get(f"{BASE_URL}/list_users_with_images", timeout=30)
+        list_resp = client.list_users_with_images()
         if list_resp.status_code == 200:
             users_data = list_resp.json()
             st.json(users_data)
         else:
             st.error(f"Error {list_resp.status_code}: {list_resp.text}")
-    except requests.RequestException as e:
+    except RequestException as e:
         st.error(f"Error connecting to server: {e}")
@@ -0,0 +1,2 @@
+# frontend/tools/__init__.py
+# Development utilities (mock backend, benchmarks). Not imported by the app.
@@ -0,0 +1,144 @@
+# frontend/tools/bench_cold_start.py
+"""Mide el arranque en frío de cada página: tiempo de importación y primer render en un proceso nuevo.
+
+Cada página se mide en su propio subproceso (caché de módulos vacía): primero se ejecutan, cronometrados,
+los `import` de nivel superior de la página; después se renderiza con AppTest contra el backend de prueba
+(primer render) y se repite (rerun en caliente). Con --baseline compara con una ejecución anterior y
+termina con código 1 si alguna página empeora más del umbral, para detectar regresiones tras un despliegue.
+
+Uso:
+    python -m tools.bench_cold_start --json cold_start.json
+    python -m tools.bench_cold_start --baseline cold_start.json --threshold 20
+"""
+import argparse
+import ast
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
+from tools.load_test import DEFAULT_PAGES, ROOT
+
+
+def measure_page(page: str, timeout: float) -> dict:
+    """Se ejecuta dentro del subproceso: imports de la página, primer render y rerun."""
+    source = (ROOT / page).read_text()
+    imports = []
+    started = time.perf_counter()
+    for node in ast.parse(source).body:
+        if isinstance(node, (ast.Import, ast.ImportFrom)):
+            statement = ast.get_source_segment(source, node)
+            t0 = time.perf_counter()
+            exec(compile(ast.Module([node], []), page, "exec"), {})
+            imports.append({"statement": statement, "ms": (time.perf_counter() - t0) * 1000})
+    import_ms = (time.perf_counter() - started) * 1000
+
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(str(ROOT / page), default_timeout=timeout)
+    at.session_state["access_token"] = "mock-coldstart"
+    at.session_state["logged_in_user"] = "coldstart"
+    t0 = time.perf_counter()
+    at.run()
+    first_render_ms = (time.perf_counter() - t0) * 1000
+    t0 = time.perf_counter()
+    at.run()
+    rerun_ms = (time.perf_counter() - t0) * 1000
+    return {
+        "page": page,
+        "import_ms": import_ms,
+        "first_render_ms": first_render_ms,
+        "rerun_ms": rerun_ms,
+        "errors": len(at.exception),
+        "slowest_imports": sorted(imports, key=lambda row: row["ms"], reverse=True)[:5],
+    }
+
+
+def run_child(page: str, timeout: float) -> dict:
+    env = dict(os.environ, PYTHONPATH=str(ROOT))
+    proc = subprocess.run([sys.executable, "-m", "tools.bench_cold_start", "--child", page, "--timeout", str(timeout)],
+                          cwd=ROOT, env=env, capture_output=True, text=True)
+    if proc.returncode != 0:
+        return {"page": page, "error": proc.stderr.strip().splitlines()[-1:] or ["sin salida"]}
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def regressions(results: dict, baseline: dict, threshold: float) -> list:
+    found = []
+    for page, row in results.items():
+        previous = baseline.get(page)
+        if not previous or "error" in row or "error" in previous:
+            continue
+        for metric in ("import_ms", "first_render_ms"):
+            if row[metric] > previous[metric] * (1 + threshold / 100):
+                found.append(f"{page}: {metric} {previous[metric]:.0f} → {row[metric]:.0f} ms")
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", nargs="+", default=DEFAULT_PAGES)
+    parser.add_argument("--repeat", type=int, default=3, help="Procesos nuevos por página (se toma la mediana)")
+    parser.add_argument("--port", type=int, default=8767)
+    parser.add_argument("--timeout", type=float, default=60, help="Tiempo máximo por render (s)")
+    parser.add_argument("--json", help="Guarda los resultados en este archivo")
+    parser.add_argument("--baseline", help="Resultados anteriores (--json) con los que comparar")
+    parser.add_argument("--threshold", type=float, default=20, help="Empeoramiento tolerado respecto a --baseline (%%)")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(measure_page(args.child, args.timeout)))
+        return
+
+    # Children inherit BASE_URL, so every page renders against the mock instead of a real backend
+    os.environ["BASE_URL"] = f"http://127.0.0.1:{args.port}"
+    from tools.mock_backend import MockConfig, make_server
+
+    server = make_server("127.0.0.1", args.port, MockConfig(latency=0.0, analysis_seconds=0.5, daily_limit=10_000))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    results = {}
+    for page in args.pages:
+        runs = [run_child(page, args.timeout) for _ in range(args.repeat)]
+        ok = [row for row in runs if "error" not in row]
+        if not ok:
+            results[page] = runs[0]
+            continue
+        median = lambda key: sorted(row[key] for row in ok)[len(ok) // 2]
+        results[page] = {
+            "import_ms": median("import_ms"),
+            "first_render_ms": median("first_render_ms"),
+            "rerun_ms": median("rerun_ms"),
+            "errors": max(row["errors"] for row in ok),
+            "slowest_imports": ok[0]["slowest_imports"],
+        }
+    server.shutdown()
+
+    print(f"\n{'Página':45} {'import ms':>10} {'1er render ms':>14} {'rerun ms':>9} {'errores':>8}")
+    for page, row in results.items():
+        if "error" in row:
+            print(f"{page:45} falló: {row['error']}")
+            continue
+        print(f"{page:45} {row['import_ms']:>10.0f} {row['first_render_ms']:>14.0f} {row['rerun_ms']:>9.0f} {row['errors']:>8}")
+        for item in row["slowest_imports"][:3]:
+            print(f"    {item['ms']:>8.0f} ms  {item['statement']}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            found = regressions(results, json.load(f), args.threshold)
+        if found:
+            print(f"\nRegresiones (> {args.threshold:.0f} %):")
+            for line in found:
+                print(f"  {line}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+# frontend/tools/bench_image_transport.py
+"""Compara el transporte de imágenes binario (image/*) frente a base64 dentro de JSON.
+
+Descarga las mismas imágenes segmentadas de tools/mock_backend.py por ambos caminos y mide
+bytes transferidos, tiempo de red y tiempo de decodificación (JSON + base64 + PIL frente a solo PIL).
+
+Uso:
+    python -m tools.bench_image_transport --images 50 --image-edge 1024
+"""
+import argparse
+import statistics
+import sys
+import threading
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def run(client, token: str, image_ids, binary: bool) -> dict:
+    from utils.images import decode_image_response
+
+    wire_bytes, fetch_ms, decode_ms = 0, [], []
+    for image_id in image_ids:
+        start = time.perf_counter()
+        resp = client.get_segmented_image(token, image_id, binary=binary)
+        content = resp.content
+        fetch_ms.append((time.perf_counter() - start) * 1000)
+        wire_bytes += len(content)
+
+        start = time.perf_counter()
+        decode_image_response(resp, "segmented_image_b64")
+        decode_ms.append((time.perf_counter() - start) * 1000)
+    return {
+        "bytes": wire_bytes,
+        "fetch_ms_p50": statistics.median(fetch_ms),
+        "decode_ms_p50": statistics.median(decode_ms),
+        "decode_ms_total": sum(decode_ms),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--images", type=int, default=30)
+    parser.add_argument("--image-edge", type=int, default=1024)
+    parser.add_argument("--port", type=int, default=8766)
+    args = parser.parse_args()
+
+    sys.path.insert(0, str(ROOT))
+    from tools.mock_backend import MockConfig, make_server
+    from utils.api_client import BackendClient
+
+    server = make_server("127.0.0.1", args.port, MockConfig(image_edge=args.image_edge, pending=args.images, history=0))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    client = BackendClient(f"http://127.0.0.1:{args.port}")
+    token = "mock-bench"
+    image_ids = [img["id"] for img in client.pending_analysis(token).json()]
+
+    results = {"base64/JSON": run(client, token, image_ids, binary=False), "binario": run(client, token, image_ids, binary=True)}
+    server.shutdown()
+
+    print(f"\n{len(image_ids)} imágenes de {args.image_edge}px\n")
+    print(f"{'Transporte':12} {'KB':>10} {'red p50 ms':>11} {'decode p50 ms':>14} {'decode total ms':>16}")
+    for name, r in results.items():
+        print(f"{name:12} {r['bytes'] / 1024:>10.1f} {r['fetch_ms_p50']:>11.2f} {r['decode_ms_p50']:>14.2f} {r['decode_ms_total']:>16.1f}")
+    saved = 1 - results["binario"]["bytes"] / results["base64/JSON"]["bytes"]
+    print(f"\nAhorro de bytes con transporte binario: {saved:.0%}")
+
+
+if __name__ == "__main__":
+    main()
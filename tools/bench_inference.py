@@ -0,0 +1,87 @@
+# frontend/tools/bench_inference.py
+"""Mide el rendimiento de segmentación por lotes (infer_many) con el backend de inferencia elegido.
+
+Genera imágenes sintéticas (o lee las de --dir), las segmenta con la concurrencia indicada y muestra
+imágenes/s y p50/p95 por imagen. --make-onnx-model crea un modelo ONNX diminuto (umbral de luminancia
+con sigmoide) para probar el backend 'onnx' sin el modelo real; necesita el paquete `onnx`.
+
+Uso:
+    python -m tools.bench_inference --backend local --images 50 --concurrency 4
+    python -m tools.bench_inference --make-onnx-model /tmp/tiny.onnx
+    INFERENCE_ONNX_MODEL=/tmp/tiny.onnx python -m tools.bench_inference --backend onnx
+    ROBOFLOW_API_KEY=... python -m tools.bench_inference --backend roboflow --images 10
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+from tools.load_test import ROOT, percentile
+
+
+def make_onnx_model(path: str, size: int = 256):
+    """Modelo 1×3×H×W -> 1×1×H×W: probabilidad de lesión = sigmoid(k · (umbral - luminancia media))."""
+    import onnx
+    from onnx import TensorProto, helper
+
+    nodes = [
+        helper.make_node("ReduceMean", ["image"], ["luma"], axes=[1], keepdims=1),
+        helper.make_node("Sub", ["threshold", "luma"], ["darkness"]),
+        helper.make_node("Mul", ["darkness", "gain"], ["logits"]),
+        helper.make_node("Sigmoid", ["logits"], ["mask"]),
+    ]
+    graph = helper.make_graph(
+        nodes, "melia-tiny-segmenter",
+        [helper.make_tensor_value_info("image", TensorProto.FLOAT, [1, 3, size, size])],
+        [helper.make_tensor_value_info("mask", TensorProto.FLOAT, [1, 1, size, size])],
+        initializer=[helper.make_tensor("threshold", TensorProto.FLOAT, [], [0.45]),
+                     helper.make_tensor("gain", TensorProto.FLOAT, [], [20.0])],
+    )
+    model = helper.make_model(graph, opset_imports=[helper.make_opsetid("", 13)])
+    model.ir_version = 8  # readable by older onnxruntime releases too
+    onnx.checker.check_model(model)
+    onnx.save(model, path)
+
+
+def load_images(directory: str, count: int, edge: int) -> dict:
+    if directory:
+        files = sorted(p for p in Path(directory).iterdir() if p.suffix.lower() in (".jpg", ".jpeg", ".png"))
+        return {p.name: p.read_bytes() for p in files[:count]}
+    from tools.mock_backend import make_jpeg
+    return {f"synthetic-{i}": make_jpeg(edge, seed=i) for i in range(count)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backend", choices=["roboflow", "onnx", "local"], default="local")
+    parser.add_argument("--images", type=int, default=30)
+    parser.add_argument("--image-edge", type=int, default=1024, help="Lado de las imágenes sintéticas (px)")
+    parser.add_argument("--dir", help="Carpeta con imágenes reales en lugar de sintéticas")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4])
+    parser.add_argument("--make-onnx-model", metavar="PATH", help="Crea el modelo ONNX de prueba y termina")
+    args = parser.parse_args()
+
+    if args.make_onnx_model:
+        make_onnx_model(args.make_onnx_model)
+        print(f"Modelo de prueba guardado en {args.make_onnx_model}")
+        return
+
+    sys.path.insert(0, str(ROOT))
+    from utils.inference import make_inference_client
+
+    client = make_inference_client(args.backend)
+    images = load_images(args.dir, args.images, args.image_edge)
+    print(f"{len(images)} imágenes · backend {args.backend}\n")
+    print(f"{'concurrencia':>12} {'img/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'errores':>8}")
+    for concurrency in args.concurrency:
+        started = time.perf_counter()
+        results = [result for _, result in client.infer_many(images, max_workers=concurrency)]
+        elapsed = time.perf_counter() - started
+        times = [r["ms"] for r in results if r["status"] == "ok"]
+        errors = len(results) - len(times)
+        print(f"{concurrency:>12} {len(results) / elapsed:>8.1f} {percentile(times, 50):>9.1f} "
+              f"{percentile(times, 95):>9.1f} {errors:>8}")
+
+
+if __name__ == "__main__":
+    main()
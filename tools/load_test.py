@@ -0,0 +1,126 @@
+# frontend/tools/load_test.py
+"""Simula N sesiones concurrentes de las páginas contra el backend de prueba y reporta tiempos de render.
+
+Levanta tools/mock_backend.py en un puerto local, ejecuta cada página con streamlit.testing.v1.AppTest
+desde N hilos (una sesión por hilo) y muestra p50/p95/p99 del tiempo de render por página, junto con
+las peticiones y bytes servidos por endpoint.
+
+Uso:
+    python -m tools.load_test --sessions 10 --reruns 3 --latency 0.05
+    python -m tools.load_test --pages pages/3_History.py --json results.json
+"""
+import argparse
+import json
+import math
+import os
+import sys
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+DEFAULT_PAGES = [
+    "main.py",
+    "pages/0_Login.py",
+    "pages/1_Upload_and_Segment.py",
+    "pages/2_Advanced_Analysis_and_Listing.py",
+    "pages/3_History.py",
+]
+
+
+def percentile(values, pct: float) -> float:
+    """Percentil por rango más cercano (suficiente para muestras pequeñas)."""
+    if not values:
+        return float("nan")
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def run_session(session_no: int, pages, reruns: int, timeout: float) -> list:
+    """Una sesión de usuario: abre cada página y la vuelve a ejecutar `reruns` veces."""
+    from streamlit.testing.v1 import AppTest
+
+    samples = []
+    for page in pages:
+        at = AppTest.from_file(str(ROOT / page), default_timeout=timeout)
+        at.session_state["access_token"] = f"mock-loaduser{session_no}"
+        at.session_state["logged_in_user"] = f"loaduser{session_no}"
+        for i in range(reruns):
+            start = time.perf_counter()
+            try:
+                at.run()
+                errors = len(at.exception)
+            except Exception:
+                errors = 1
+            samples.append({
+                "session": session_no,
+                "page": page,
+                "run": i,
+                "seconds": time.perf_counter() - start,
+                "errors": errors,
+            })
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=5, help="Sesiones concurrentes")
+    parser.add_argument("--reruns", type=int, default=3, help="Ejecuciones de cada página por sesión")
+    parser.add_argument("--pages", nargs="+", default=DEFAULT_PAGES)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.02, help="Latencia del backend de prueba (s)")
+    parser.add_argument("--image-edge", type=int, default=512, help="Lado de las imágenes del backend de prueba (px)")
+    parser.add_argument("--history", type=int, default=20, help="Análisis por usuario en el backend de prueba")
+    parser.add_argument("--pending", type=int, default=10, help="Pendientes por usuario en el backend de prueba")
+    parser.add_argument("--timeout", type=float, default=60, help="Tiempo máximo por render (s)")
+    parser.add_argument("--json", help="Guarda las muestras y el resumen en este archivo")
+    args = parser.parse_args()
+
+    # The app reads BASE_URL at import time, so it must point to the mock before any page runs
+    os.environ["BASE_URL"] = f"http://127.0.0.1:{args.port}"
+    os.chdir(ROOT)
+    sys.path.insert(0, str(ROOT))
+
+    from tools.mock_backend import MockConfig, make_server
+
+    config = MockConfig(latency=args.latency, analysis_seconds=0.5, image_edge=args.image_edge,
+                        pending=args.pending, history=args.history, daily_limit=10_000)
+    server = make_server("127.0.0.1", args.port, config)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.sessions) as executor:
+        futures = [executor.submit(run_session, n, args.pages, args.reruns, args.timeout) for n in range(args.sessions)]
+        samples = [sample for future in futures for sample in future.result()]
+    wall_time = time.perf_counter() - started
+    server.shutdown()
+
+    by_page = defaultdict(list)
+    errors = defaultdict(int)
+    for sample in samples:
+        by_page[sample["page"]].append(sample["seconds"])
+        errors[sample["page"]] += sample["errors"]
+
+    summary = {"wall_time": wall_time, "pages": {}, "endpoints": {k: dict(v) for k, v in server.store.stats.items()}}
+    print(f"\n{args.sessions} sesiones × {args.reruns} ejecuciones en {wall_time:.1f} s\n")
+    print(f"{'Página':45} {'n':>4} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errores':>8}")
+    for page, values in by_page.items():
+        row = {p: percentile(values, p) * 1000 for p in (50, 95, 99)}
+        summary["pages"][page] = {"n": len(values), "p50_ms": row[50], "p95_ms": row[95], "p99_ms": row[99], "errors": errors[page]}
+        print(f"{page:45} {len(values):>4} {row[50]:>9.1f} {row[95]:>9.1f} {row[99]:>9.1f} {errors[page]:>8}")
+
+    print(f"\n{'Endpoint':30} {'peticiones':>11} {'bytes':>14}")
+    for endpoint, stats in sorted(summary["endpoints"].items()):
+        print(f"{endpoint:30} {stats['requests']:>11} {stats['bytes']:>14,}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"summary": summary, "samples": samples}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
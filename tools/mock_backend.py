@@ -0,0 +1,649 @@
+# frontend/tools/mock_backend.py
+"""Backend local de prueba (sin dependencias externas) para desarrollar el frontend sin el servicio FastAPI.
+
+Implementa todos los endpoints que usan las páginas, con latencia y tamaño de imagen configurables,
+y cuenta peticiones y bytes enviados por endpoint (ver /_stats y tools/load_test.py).
+
+Uso:
+    python -m tools.mock_backend --port 8080 --analysis-seconds 5 --latency 0.05
+    python -m tools.mock_backend --token-ttl 60   # access tokens que expiran pronto (prueba de /refresh)
+    BASE_URL=http://localhost:8080 streamlit run main.py
+"""
+import argparse
+import base64
+import hashlib
+import hmac
+import json
+import math
+import re
+import secrets
+import threading
+import time
+import uuid
+from collections import defaultdict
+from datetime import datetime, timedelta
+from email.parser import BytesParser
+from email.policy import default as default_policy
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import BytesIO
+from urllib.parse import parse_qs, parse_qsl, urlparse
+
+# Access tokens are HS256 JWTs signed with this key; "mock-<user>" tokens are still accepted and never expire
+JWT_SECRET = b"melia-mock-secret"
+
+BODY_PARTS = ["Brazo izquierdo", "Espalda", "Tórax", "Pierna derecha", "Cuello"]
+
+
+def _b64url(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+def encode_jwt(claims: dict) -> str:
+    header = _b64url(json.dumps({"alg": "HS256", "typ": "JWT"}).encode())
+    payload = _b64url(json.dumps(claims).encode())
+    signature = hmac.new(JWT_SECRET, f"{header}.{payload}".encode(), hashlib.sha256).digest()
+    return f"{header}.{payload}.{_b64url(signature)}"
+
+
+def decode_jwt(token: str):
+    """Claims de un JWT firmado por este backend; None si el formato o la firma no son válidos."""
+    try:
+        header, payload, signature = token.split(".")
+        expected = hmac.new(JWT_SECRET, f"{header}.{payload}".encode(), hashlib.sha256).digest()
+        if not hmac.compare_digest(_b64url(expected), signature):
+            return None
+        return json.loads(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))
+    except (ValueError, json.JSONDecodeError):
+        return None
+
+
+class MockConfig:
+    def __init__(self, latency: float = 0.0, analysis_seconds: float = 2.0, image_edge: int = 512,
+                 pending: int = 5, history: int = 10, daily_limit: int = 20, token_ttl: int = 900):
+        self.latency = latency  # added to every request
+        self.analysis_seconds = analysis_seconds  # duration of /start_process
+        self.image_edge = image_edge  # size of generated images (payload size)
+        self.pending = pending  # pending images created per user on first contact
+        self.history = history  # already analysed images created per user on first contact
+        self.daily_limit = daily_limit  # uploads per user and day before /upload_image answers 400
+        self.token_ttl = token_ttl  # lifetime (s) of the JWT access tokens issued by /login and /refresh
+
+
+def lesion_geometry(seed: int):
+    """Centro y radios de la 'mancha' sintética, como fracciones del tamaño de la imagen."""
+    r = 0.25 + (seed % 5) * 0.02
+    return 0.5, 0.5, r, r * 0.8
+
+
+def lesion_polygon(seed: int, width: int, height: int, n_points: int = 24) -> list:
+    cx, cy, rx, ry = lesion_geometry(seed)
+    return [
+        {"x": round((cx + rx * math.cos(2 * math.pi * i / n_points)) * width, 1),
+         "y": round((cy + ry * math.sin(2 * math.pi * i / n_points)) * height, 1)}
+        for i in range(n_points)
+    ]
+
+
+def make_jpeg(edge: int, seed: int = 0, outline: bool = False) -> bytes:
+    """Genera una imagen JPEG sintética con una mancha elíptica (y su contorno si `outline`)."""
+    from PIL import Image, ImageDraw
+
+    img = Image.new("RGB", (edge, edge), (224 - seed % 20, 180, 160))
+    draw = ImageDraw.Draw(img)
+    cx, cy, rx, ry = lesion_geometry(seed)
+    box = ((cx - rx) * edge, (cy - ry) * edge, (cx + rx) * edge, (cy + ry) * edge)
+    draw.ellipse(box, fill=(90, 50, 40))
+    if outline:
+        draw.ellipse(box, outline=(0, 255, 0), width=max(2, edge // 128))
+    out = BytesIO()
+    img.save(out, format="JPEG", quality=85)
+    return out.getvalue()
+
+
+def segmentation_result(seed: int, width: int, height: int, classification: str) -> dict:
+    """Resultado con el formato de Roboflow (predicciones con polígono), como el de test.ipynb."""
+    cx, cy, rx, ry = lesion_geometry(seed)
+    return {
+        "image": {"width": width, "height": height},
+        "predictions": [{
+            "x": cx * width,
+            "y": cy * height,
+            "width": 2 * rx * width,
+            "height": 2 * ry * height,
+            "confidence": 0.9,
+            "class": classification,
+            "points": lesion_polygon(seed, width, height),
+        }],
+    }
+
+
+def make_analysis(seed: int, first_classification: str) -> dict:
+    malignant = seed % 3 == 0
+    return {
+        "asymmetry": "Leve asimetría",
+        "border_irregularity": "Bordes regulares",
+        "color_variegation": "Color homogéneo",
+        "diameter_assessment": "Menor a 6 mm",
+        "evolution_assessment": "Sin cambios reportados",
+        "segmentation_analysis": f"Clasificación inicial: {first_classification}",
+        "image_technical_commentaries": "Imagen sintética del backend de prueba",
+        "other_diagnoses": "N/A",
+        "extra_info_influence": "N/A",
+        "advance_classification": "malignant" if malignant else "benign",
+        "confidence_level": 0.82 if malignant else 0.64,
+        "final_explanation": "Resultado generado por tools/mock_backend.py",
+    }
+
+
+class MockStore:
+    def __init__(self, config: MockConfig):
+        self.config = config
+        self.lock = threading.Lock()
+        self.users = {}  # username -> password
+        self.images = {}  # image_id -> dict
+        self.jobs = {}  # job_id -> dict
+        self.uploads = {}  # chunked upload_id -> {"username", "meta", "chunks"}
+        self.refresh_tokens = {}  # refresh token -> username (rotated on every /refresh)
+        self.uploads_today = defaultdict(int)  # (username, date) -> count
+        self.seeded = set()
+        self.stats = defaultdict(lambda: {"requests": 0, "bytes": 0})
+        self._jpeg_cache = {}
+
+    def record(self, endpoint: str, nbytes: int):
+        with self.lock:
+            self.stats[endpoint]["requests"] += 1
+            self.stats[endpoint]["bytes"] += nbytes
+
+    def jpeg(self, seed: int, outline: bool = False) -> bytes:
+        key = (self.config.image_edge, seed % 16, outline)
+        if key not in self._jpeg_cache:
+            self._jpeg_cache[key] = make_jpeg(*key)
+        return self._jpeg_cache[key]
+
+    def original_bytes(self, image: dict) -> bytes:
+        return image.get("data") or self.jpeg(image["seed"])
+
+    def add_image(self, username: str, body_part: str = "", timestamp: str = None, data: bytes = None) -> dict:
+        with self.lock:
+            image_id = uuid.uuid4().hex[:24]
+            seed = len(self.images)
+            image = {
+                "id": image_id,
+                "username": username,
+                "body_part": body_part,
+                "timestamp": timestamp or datetime.now().isoformat(),
+                "first_classification": "benign" if seed % 3 else "malignant",
+                "seed": seed,
+                "data": data,
+                "analysis": None,
+                "analysis_id": None,
+                "analysis_date": None,
+            }
+            self.images[image_id] = image
+            return image
+
+    def seed_user(self, username: str):
+        with self.lock:
+            if username in self.seeded:
+                return
+            self.seeded.add(username)
+        now = datetime.now()
+        for i in range(self.config.history):
+            when = (now - timedelta(days=3 * i + 1)).isoformat()
+            image = self.add_image(username, BODY_PARTS[i % len(BODY_PARTS)], when)
+            self._set_analysis(image, when)
+        for i in range(self.config.pending):
+            self.add_image(username, BODY_PARTS[i % len(BODY_PARTS)])
+
+    def _set_analysis(self, image: dict, when: str = None):
+        image["analysis"] = make_analysis(image["seed"], image["first_classification"])
+        image["analysis_id"] = uuid.uuid4().hex[:24]
+        image["analysis_date"] = when or datetime.now().isoformat()
+
+    def segmentation(self, image: dict) -> dict:
+        width, height = image.get("size") or (self.config.image_edge, self.config.image_edge)
+        return segmentation_result(image["seed"], width, height, image["first_classification"])
+
+    def analysis_doc(self, image: dict, include_images: bool = False) -> dict:
+        doc = {
+            "id": image["analysis_id"],
+            "image_id": image["id"],
+            "username": image["username"],
+            "body_part": image["body_part"],
+            "analysis_date": image["analysis_date"],
+            "analysis": image["analysis"],
+            "final_classification": image["analysis"]["advance_classification"],
+            "overall_recommendation": "Consulte a un dermatólogo para una revisión presencial.",
+            "segmentation_result": self.segmentation(image),
+        }
+        if include_images:
+            doc["image_b64"] = base64.b64encode(self.original_bytes(image)).decode()
+            doc["segmented_image_b64"] = base64.b64encode(self.jpeg(image["seed"], outline=True)).decode()
+        return doc
+
+    def analyse(self, username: str, image_id: str = None, body_part: str = None):
+        time.sleep(self.config.analysis_seconds)
+        with self.lock:
+            candidates = [
+                img for img in self.images.values()
+                if img["username"] == username
+                and (image_id is None or img["id"] == image_id)
+                and (not body_part or img["body_part"] == body_part)
+            ]
+            if not candidates:
+                return None
+            image = max(candidates, key=lambda img: img["timestamp"])
+            self._set_analysis(image)
+            doc = self.analysis_doc(image)
+            doc["analysis"] = [doc["analysis"]]  # /start_process returns the list form
+            return doc
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    store: MockStore = None
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real service behind uvicorn
+
+    routes = [
+        ("POST", r"^/login$", "login"),
+        ("POST", r"^/register$", "register"),
+        ("POST", r"^/refresh$", "refresh"),
+        ("POST", r"^/upload_image$", "upload_image"),
+        ("POST", r"^/upload_chunked/init$", "upload_chunked_init"),
+        ("PUT", r"^/upload_chunked/(?P<upload_id>[^/]+)/(?P<index>\d+)$", "upload_chunked_put"),
+        ("GET", r"^/upload_chunked/(?P<upload_id>[^/]+)$", "upload_chunked_status"),
+        ("POST", r"^/upload_chunked/(?P<upload_id>[^/]+)/commit$", "upload_chunked_commit"),
+        ("GET", r"^/pending_analysis$", "pending_analysis"),
+        ("GET", r"^/get_segmented_image/(?P<image_id>[^/]+)$", "get_segmented_image"),
+        ("GET", r"^/get_image/(?P<image_id>[^/]+)$", "get_image"),
+        ("POST", r"^/start_process$", "start_process"),
+        ("GET", r"^/process_status/(?P<job_id>[^/]+)$", "process_status"),
+        ("GET", r"^/list_analyses$", "list_analyses"),
+        ("DELETE", r"^/delete_image/(?P<image_id>[^/]+)$", "delete_image"),
+        ("DELETE", r"^/delete_analysis/(?P<analysis_id>[^/]+)$", "delete_analysis"),
+        ("GET", r"^/list_users_with_images$", "list_users_with_images"),
+        ("GET", r"^/_stats$", "get_stats"),
+    ]
+
+    def log_message(self, format, *args):
+        pass
+
+    # --- plumbing ---
+    def _dispatch(self, method: str):
+        time.sleep(self.store.config.latency)
+        parsed = urlparse(self.path)
+        self.query = {k: v[-1] for k, v in parse_qs(parsed.query).items()}
+        self.endpoint = "not_found"
+        for route_method, pattern, name in self.routes:
+            match = re.match(pattern, parsed.path)
+            if route_method == method and match:
+                self.endpoint = name
+                return getattr(self, name)(**match.groupdict())
+        self.send_json(404, {"detail": "Not Found"})
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def do_PUT(self):
+        self._dispatch("PUT")
+
+    def do_DELETE(self):
+        self._dispatch("DELETE")
+
+    def read_body(self) -> bytes:
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length) if length else b""
+
+    def read_json(self) -> dict:
+        body = self.read_body()
+        return json.loads(body) if body else {}
+
+    def read_form(self):
+        """Devuelve (campos, archivos) de un cuerpo multipart/form-data o urlencoded."""
+        body = self.read_body()
+        content_type = self.headers.get("Content-Type", "")
+        if not content_type.startswith("multipart/form-data"):
+            return dict(parse_qsl(body.decode())), {}
+        message = BytesParser(policy=default_policy).parsebytes(
+            f"Content-Type: {content_type}\r\n\r\n".encode() + body
+        )
+        fields, files = {}, {}
+        for part in message.iter_parts():
+            name = part.get_param("name", header="content-disposition")
+            payload = part.get_payload(decode=True) or b""
+            if part.get_filename():
+                files[name] = (part.get_filename(), payload, part.get_content_type())
+            else:
+                fields[name] = payload.decode()
+        return fields, files
+
+    def send_bytes(self, status: int, body: bytes, content_type: str, headers: dict = None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+        self.store.record(self.endpoint, len(body))
+
+    def send_json(self, status: int, payload, headers: dict = None):
+        self.send_bytes(status, json.dumps(payload).encode(), "application/json", headers)
+
+    def wants_binary_image(self) -> bool:
+        return "image/" in self.headers.get("Accept", "")
+
+    def send_image(self, image_id: str, data: bytes, field: str):
+        """Bytes crudos si el cliente acepta image/*; si no, JSON con base64 como el backend original."""
+        if self.wants_binary_image():
+            return self.send_bytes(200, data, "image/jpeg")
+        self.send_json(200, {"id": image_id, field: base64.b64encode(data).decode()})
+
+    def current_user(self):
+        auth = self.headers.get("Authorization", "")
+        if auth.startswith("Bearer mock-"):
+            username = auth[len("Bearer mock-"):]
+        else:
+            claims = decode_jwt(auth[len("Bearer "):]) if auth.startswith("Bearer ") else None
+            if claims is None:
+                self.send_json(401, {"detail": "Not authenticated"})
+                return None
+            if claims["exp"] < time.time():
+                self.send_json(401, {"detail": "Token expired"}, headers={"WWW-Authenticate": 'Bearer error="invalid_token"'})
+                return None
+            username = claims["sub"]
+        self.store.seed_user(username)
+        return username
+
+    def issue_tokens(self, username: str) -> dict:
+        refresh_token = secrets.token_urlsafe(32)
+        with self.store.lock:
+            self.store.refresh_tokens[refresh_token] = username
+        return {
+            "access_token": encode_jwt({"sub": username, "exp": int(time.time()) + self.store.config.token_ttl}),
+            "refresh_token": refresh_token,
+            "token_type": "bearer",
+            "expires_in": self.store.config.token_ttl,
+        }
+
+    def owned_image(self, username: str, image_id: str):
+        image = self.store.images.get(image_id)
+        if image is None or image["username"] != username:
+            self.send_json(404, {"detail": "Image not found"})
+            return None
+        return image
+
+    # --- endpoints ---
+    def login(self):
+        data = self.read_json()
+        username, password = data.get("username"), data.get("password")
+        known = self.store.users.get(username)
+        if not username or (known is not None and known != password):
+            return self.send_json(401, {"detail": "Credenciales inválidas"})
+        self.store.seed_user(username)
+        self.send_json(200, self.issue_tokens(username))
+
+    def refresh(self):
+        refresh_token = self.read_json().get("refresh_token")
+        with self.store.lock:
+            username = self.store.refresh_tokens.pop(refresh_token, None)
+        if username is None:
+            return self.send_json(401, {"detail": "Refresh token inválido"})
+        self.send_json(200, self.issue_tokens(username))
+
+    def register(self):
+        data = self.read_json()
+        if self.store.users.get(data.get("username")):
+            return self.send_json(400, {"detail": "El usuario ya existe"})
+        self.store.users[data.get("username")] = data.get("password")
+        self.send_json(200, {"message": "ok"})
+
+    def upload_image(self):
+        username = self.current_user()
+        if username is None:
+            return
+        fields, files = self.read_form()
+        if "file" not in files:
+            return self.send_json(422, {"detail": "Falta el archivo"})
+        _, data, _ = files["file"]
+        self.accept_upload(username, fields, data)
+
+    def accept_upload(self, username: str, fields: dict, data: bytes):
+        """Registra la imagen y responde como /upload_image (límite diario, segmentación y overlay)."""
+        day_key = (username, datetime.now().date())
+        if self.store.uploads_today[day_key] >= self.store.config.daily_limit:
+            return self.send_json(400, {"detail": "Has alcanzado el límite diario de imágenes."})
+        self.store.uploads_today[day_key] += 1
+
+        image = self.store.add_image(username, fields.get("body_part", ""), fields.get("timestamp"), data)
+        try:
+            from PIL import Image
+            image["size"] = Image.open(BytesIO(data)).size
+        except Exception:
+            pass
+        response = {
+            "id": image["id"],
+            "first_classification": image["first_classification"],
+            "segmentation_result": self.store.segmentation(image),
+        }
+        # Clients that draw the overlay themselves send include_overlay=false and skip the second JPEG
+        if fields.get("include_overlay", "true").lower() != "false":
+            response["segmented_image_b64"] = base64.b64encode(self.store.jpeg(image["seed"], outline=True)).decode()
+        self.send_json(200, response)
+
+    # --- chunked, resumable uploads ---
+    def upload_chunked_init(self):
+        """Crea (o retoma) una subida por partes; devuelve las partes ya recibidas."""
+        username = self.current_user()
+        if username is None:
+            return
+        meta = self.read_json()
+        upload_id = meta.get("upload_id")
+        if not upload_id or not meta.get("total_chunks"):
+            return self.send_json(422, {"detail": "upload_id y total_chunks son obligatorios"})
+        with self.store.lock:
+            upload = self.store.uploads.setdefault(upload_id, {"username": username, "meta": meta, "chunks": {}})
+        if upload["username"] != username:
+            return self.send_json(403, {"detail": "Forbidden"})
+        self.send_json(200, {"upload_id": upload_id, "received": sorted(upload["chunks"])})
+
+    def chunked_upload(self, username: str, upload_id: str):
+        upload = self.store.uploads.get(upload_id)
+        if upload is None or upload["username"] != username:
+            self.send_json(404, {"detail": "Upload not found"})
+            return None
+        return upload
+
+    def upload_chunked_put(self, upload_id: str, index: str):
+        username = self.current_user()
+        if username is None:
+            return
+        upload = self.chunked_upload(username, upload_id)
+        if upload is None:
+            return
+        upload["chunks"][int(index)] = self.read_body()
+        self.send_json(200, {"upload_id": upload_id, "received": int(index)})
+
+    def upload_chunked_status(self, upload_id: str):
+        username = self.current_user()
+        if username is None:
+            return
+        upload = self.chunked_upload(username, upload_id)
+        if upload is None:
+            return
+        self.send_json(200, {"upload_id": upload_id, "received": sorted(upload["chunks"])})
+
+    def upload_chunked_commit(self, upload_id: str):
+        username = self.current_user()
+        if username is None:
+            return
+        upload = self.chunked_upload(username, upload_id)
+        if upload is None:
+            return
+        fields, _ = self.read_form()
+        total = int(upload["meta"]["total_chunks"])
+        missing = [i for i in range(total) if i not in upload["chunks"]]
+        if missing:
+            return self.send_json(409, {"detail": "Faltan partes", "missing": missing})
+        data = b"".join(upload["chunks"][i] for i in range(total))
+        if len(data) != int(upload["meta"].get("total_size", len(data))):
+            return self.send_json(409, {"detail": "Tamaño final incorrecto"})
+        del self.store.uploads[upload_id]
+        self.accept_upload(username, fields, data)
+
+    def pending_analysis(self):
+        username = self.current_user()
+        if username is None:
+            return
+        pending = [
+            {k: img[k] for k in ("id", "username", "body_part", "timestamp", "first_classification")}
+            for img in list(self.store.images.values())
+            if img["username"] == username and img["analysis"] is None
+        ]
+        body = json.dumps(pending).encode()
+        etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+        if self.headers.get("If-None-Match") == etag:
+            return self.send_bytes(304, b"", "application/json", {"ETag": etag})
+        self.send_bytes(200, body, "application/json", {"ETag": etag})
+
+    def get_segmented_image(self, image_id: str):
+        username = self.current_user()
+        if username is None:
+            return
+        image = self.owned_image(username, image_id)
+        if image is None:
+            return
+        self.send_image(image_id, self.store.jpeg(image["seed"], outline=True), "segmented_image_b64")
+
+    def get_image(self, image_id: str):
+        username = self.current_user()
+        if username is None:
+            return
+        image = self.owned_image(username, image_id)
+        if image is None:
+            return
+        self.send_image(image_id, self.store.original_bytes(image), "image_b64")
+
+    def start_process(self):
+        username = self.current_user()
+        if username is None:
+            return
+        payload = self.read_json()
+        args = (payload.get("username", username), payload.get("image_id"), payload.get("body_part"))
+        if "respond-async" in self.headers.get("Prefer", ""):
+            job_id = uuid.uuid4().hex
+            job = {"status": "running"}
+            self.store.jobs[job_id] = job
+
+            def work():
+                doc = self.store.analyse(*args)
+                if doc is None:
+                    job.update(status="failed", status_code=404, detail="No image found")
+                else:
+                    job.update(status="done", result=doc)
+
+            threading.Thread(target=work, daemon=True).start()
+            return self.send_json(202, {"job_id": job_id, "status": "running"})
+
+        doc = self.store.analyse(*args)
+        if doc is None:
+            return self.send_json(404, {"detail": "No image found"})
+        self.send_json(200, doc)
+
+    def process_status(self, job_id: str):
+        if self.current_user() is None:
+            return
+        job = self.store.jobs.get(job_id)
+        if job is None:
+            return self.send_json(404, {"detail": "Job not found"})
+        self.send_json(200, {"job_id": job_id, **job})
+
+    def list_analyses(self):
+        username = self.current_user()
+        if username is None:
+            return
+        start = self.query.get("start_date")
+        end = self.query.get("end_date")
+        body_part = self.query.get("body_part")
+        # include_images=false returns metadata only; images are then fetched by id
+        include_images = self.query.get("include_images", "true").lower() != "false"
+        docs = []
+        for image in list(self.store.images.values()):
+            if image["username"] != username or image["analysis"] is None:
+                continue
+            day = image["analysis_date"][:10]
+            if (start and day < start) or (end and day > end):
+                continue
+            if body_part and image["body_part"] != body_part:
+                continue
+            docs.append(self.store.analysis_doc(image, include_images=include_images))
+        docs.sort(key=lambda d: d["analysis_date"], reverse=True)
+        body = json.dumps(docs).encode()
+        etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+        if self.headers.get("If-None-Match") == etag:
+            return self.send_bytes(304, b"", "application/json", {"ETag": etag})
+        self.send_bytes(200, body, "application/json", {"ETag": etag})
+
+    def delete_image(self, image_id: str):
+        username = self.current_user()
+        if username is None or self.owned_image(username, image_id) is None:
+            return
+        self.store.images.pop(image_id, None)
+        self.send_json(200, {"message": "Image deleted"})
+
+    def delete_analysis(self, analysis_id: str):
+        username = self.current_user()
+        if username is None:
+            return
+        for image in list(self.store.images.values()):
+            if image["username"] == username and image["analysis_id"] == analysis_id:
+                image["analysis"] = image["analysis_id"] = image["analysis_date"] = None
+                return self.send_json(200, {"message": "Analysis deleted"})
+        self.send_json(404, {"detail": "Analysis not found"})
+
+    def list_users_with_images(self):
+        counts = defaultdict(int)
+        for image in list(self.store.images.values()):
+            counts[image["username"]] += 1
+        self.send_json(200, [{"username": u, "image_count": n} for u, n in sorted(counts.items())])
+
+    def get_stats(self):
+        with self.store.lock:
+            stats = {name: dict(values) for name, values in self.store.stats.items()}
+        self.send_json(200, stats)
+
+
+def make_server(host: str = "127.0.0.1", port: int = 8080, config: MockConfig = None) -> ThreadingHTTPServer:
+    handler = type("BoundMockHandler", (MockHandler,), {"store": MockStore(config or MockConfig())})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.store = handler.store
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--latency", type=float, default=0.0, help="Latencia añadida a cada petición (s)")
+    parser.add_argument("--analysis-seconds", type=float, default=2.0, help="Duración de /start_process (s)")
+    parser.add_argument("--image-edge", type=int, default=512, help="Lado de las imágenes generadas (px)")
+    parser.add_argument("--pending", type=int, default=5, help="Imágenes pendientes creadas por usuario")
+    parser.add_argument("--history", type=int, default=10, help="Análisis ya realizados creados por usuario")
+    parser.add_argument("--daily-limit", type=int, default=20, help="Subidas por usuario y día antes de responder 400")
+    parser.add_argument("--token-ttl", type=int, default=900, help="Vida de los access tokens JWT (s)")
+    args = parser.parse_args()
+
+    config = MockConfig(args.latency, args.analysis_seconds, args.image_edge, args.pending, args.history, args.daily_limit,
+                        args.token_ttl)
+    server = make_server(args.host, args.port, config)
+    print(f"Mock backend en http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
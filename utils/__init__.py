@@ -0,0 +1,2 @@
+# frontend/utils/__init__.py
+# Shared helpers used by the Streamlit pages.
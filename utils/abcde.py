@@ -0,0 +1,185 @@
+# frontend/utils/abcde.py
+"""Criterios ABCDE estimados al instante a partir de la máscara de la primera segmentación.
+
+Todo es NumPy vectorizado sobre la máscara rasterizada a resolución reducida, así que el cálculo tarda
+milisegundos y se muestra justo después de /upload_image, mientras el análisis avanzado sigue pendiente.
+Son medidas geométricas orientativas, no una evaluación clínica.
+"""
+import hashlib
+import json
+import os
+from io import BytesIO
+
+import numpy as np
+import streamlit as st
+
+from utils import perf
+from utils.overlay import parse_segmentation
+
+# Mask and colour statistics are computed with the image downscaled to this longest edge
+ABCDE_MAX_EDGE = int(os.getenv("ABCDE_MAX_EDGE", "512"))
+# Physical scale of the photo, when known (e.g. fixed-distance capture); otherwise D is only given in pixels
+MM_PER_PIXEL = float(os.getenv("ABCDE_MM_PER_PIXEL", "0")) or None
+PENCIL_MM = 6.0
+
+# Same keys and labels as display_analysis_details
+ABCDE_LABELS = [
+    ("asymmetry", "A - Asimetría"),
+    ("border_irregularity", "B - Irregularidad del Borde"),
+    ("color_variegation", "C - Variegación del Color"),
+    ("diameter_assessment", "D - Evaluación del Diámetro"),
+    ("evolution_assessment", "E - Evaluación de la Evolución"),
+]
+
+# Reference colours of the dermoscopic ABCD rule; every pixel is assigned to the nearest one
+REFERENCE_COLORS = {
+    "blanco": (235, 235, 230),
+    "rojo": (190, 60, 60),
+    "marrón claro": (170, 110, 75),
+    "marrón oscuro": (95, 55, 40),
+    "azul grisáceo": (100, 115, 135),
+    "negro": (30, 25, 25),
+}
+# A colour counts when it covers at least this share of the lesion
+COLOR_MIN_SHARE = 0.05
+COLOR_SAMPLE = 20000
+
+
+def lesion_mask(size, polygons, source_size) -> np.ndarray:
+    """Máscara booleana (alto × ancho) de los polígonos, escalados de `source_size` a `size`."""
+    from PIL import Image, ImageDraw
+
+    scale = np.array(size, dtype=np.float64) / np.array(source_size, dtype=np.float64)
+    mask = Image.new("L", size, 0)
+    draw = ImageDraw.Draw(mask)
+    for polygon in polygons:
+        draw.polygon([tuple(p) for p in polygon * scale], fill=255)
+    return np.asarray(mask) > 0
+
+
+def lesion_pixels(image, polygons, source_size=None):
+    """Imagen RGB reducida a ABCDE_MAX_EDGE y máscara de la lesión a esa misma resolución."""
+    original_size = image.size
+    image = image.convert("RGB")  # a copy, so thumbnail() never touches a cached image
+    image.thumbnail((ABCDE_MAX_EDGE, ABCDE_MAX_EDGE))
+    return image, lesion_mask(image.size, polygons, source_size or original_size)
+
+
+def asymmetry_index(mask: np.ndarray) -> float:
+    """Fracción del área que no se superpone al reflejarla sobre cada eje principal (media de los dos ejes)."""
+    ys, xs = np.nonzero(mask)
+    cx, cy = xs.mean(), ys.mean()
+    dx, dy = xs - cx, ys - cy
+    mu20, mu02, mu11 = (dx * dx).mean(), (dy * dy).mean(), (dx * dy).mean()
+    theta = 0.5 * np.arctan2(2 * mu11, mu20 - mu02)
+    height, width = mask.shape
+    scores = []
+    # Reflection across the major axis (angle theta) and across the minor axis (theta + 90°)
+    for angle in (theta, theta + np.pi / 2):
+        cos2, sin2 = np.cos(2 * angle), np.sin(2 * angle)
+        rx = np.rint(cx + dx * cos2 + dy * sin2).astype(np.int64)
+        ry = np.rint(cy + dx * sin2 - dy * cos2).astype(np.int64)
+        inside = (rx >= 0) & (rx < width) & (ry >= 0) & (ry < height)
+        overlap = np.count_nonzero(mask[ry[inside], rx[inside]])
+        scores.append(1 - overlap / xs.size)
+    return float(np.mean(scores))
+
+
+def compactness(mask: np.ndarray) -> float:
+    """perímetro² / (4π·área): 1 para un círculo, mayor cuanto más irregular es el borde."""
+    padded = np.pad(mask, 1)
+    # Boundary crossings along rows and columns; π/4 corrects the staircase overestimate of a 4-connected contour
+    crossings = np.count_nonzero(np.diff(padded, axis=0)) + np.count_nonzero(np.diff(padded, axis=1))
+    perimeter = crossings * np.pi / 4
+    return float(perimeter ** 2 / (4 * np.pi * mask.sum()))
+
+
+def color_shares(pixels: np.ndarray) -> dict:
+    """Proporción de píxeles de la lesión asignados a cada color de referencia."""
+    if len(pixels) > COLOR_SAMPLE:
+        pixels = pixels[:: len(pixels) // COLOR_SAMPLE]
+    palette = np.array(list(REFERENCE_COLORS.values()), dtype=np.float32)
+    distances = ((pixels[:, None, :].astype(np.float32) - palette[None, :, :]) ** 2).sum(axis=2)
+    counts = np.bincount(distances.argmin(axis=1), minlength=len(palette))
+    return dict(zip(REFERENCE_COLORS, counts / counts.sum()))
+
+
+def _asymmetry_label(index: float) -> str:
+    if index < 0.1:
+        return f"Simétrica (índice {index:.2f})"
+    if index < 0.2:
+        return f"Leve asimetría (índice {index:.2f})"
+    return f"Asimetría marcada (índice {index:.2f})"
+
+
+def _border_label(value: float) -> str:
+    if value < 1.25:
+        return f"Bordes regulares (compacidad {value:.2f})"
+    if value < 1.6:
+        return f"Bordes levemente irregulares (compacidad {value:.2f})"
+    return f"Bordes irregulares (compacidad {value:.2f})"
+
+
+def _color_label(colors: list) -> str:
+    if len(colors) <= 1:
+        return f"Color homogéneo ({', '.join(colors) or 'sin datos'})"
+    return f"{len(colors)} tonos: {', '.join(colors)}"
+
+
+def _diameter_label(diameter_px: float) -> str:
+    if MM_PER_PIXEL:
+        diameter_mm = diameter_px * MM_PER_PIXEL
+        relation = "Mayor" if diameter_mm > PENCIL_MM else "Menor"
+        return f"{relation} a {PENCIL_MM:.0f} mm (≈{diameter_mm:.1f} mm equivalentes)"
+    return f"Estimación en píxeles, sin referencia de escala: diámetro equivalente de {diameter_px:.0f} px"
+
+
+@perf.timed_fn("ABCDE local")
+def extract_features(data: bytes, segmentation):
+    """Criterios ABCDE de la imagen `data` y su segmentación; None si no hay geometría utilizable."""
+    from PIL import Image
+
+    source_size, polygons = parse_segmentation(segmentation)
+    if not polygons:
+        return None
+    image = Image.open(BytesIO(data))
+    original_size = image.size
+    image, mask = lesion_pixels(image, polygons, source_size)
+    area = int(mask.sum())
+    if area < 16:
+        return None
+
+    shares = color_shares(np.asarray(image)[mask])
+    colors = [name for name, share in sorted(shares.items(), key=lambda kv: -kv[1]) if share >= COLOR_MIN_SHARE]
+    # Equivalent diameter back in original pixels
+    diameter_px = 2 * np.sqrt(area / np.pi) * original_size[0] / image.size[0]
+    asym = asymmetry_index(mask)
+    compact = compactness(mask)
+    return {
+        "asymmetry": _asymmetry_label(asym),
+        "border_irregularity": _border_label(compact),
+        "color_variegation": _color_label(colors),
+        "diameter_assessment": _diameter_label(diameter_px),
+        "evolution_assessment": "Requiere imágenes anteriores de la misma lesión",
+        "metrics": {
+            "asymmetry_index": asym,
+            "compactness": compact,
+            "color_shares": {name: float(share) for name, share in shares.items()},
+            "equivalent_diameter_px": float(diameter_px),
+            "area_fraction": area / mask.size,
+        },
+    }
+
+
+@st.cache_data(show_spinner=False, max_entries=256)
+def _cached_features(image_hash: str, segmentation_json: str, _data: bytes):
+    return extract_features(_data, json.loads(segmentation_json))
+
+
+def abcde_features(data: bytes, segmentation):
+    """Como extract_features, cacheado por hash de la imagen (y de la segmentación)."""
+    if not data or not segmentation:
+        return None
+    if not isinstance(segmentation, str):
+        segmentation = json.dumps(segmentation, sort_keys=True)
+    return _cached_features(hashlib.sha256(data).hexdigest(), segmentation, data)
@@ -0,0 +1,57 @@
+# frontend/utils/analyses_cache.py
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import streamlit as st
+
+# Seconds a /list_analyses response is reused before asking the backend again
+LIST_ANALYSES_TTL = int(os.getenv("LIST_ANALYSES_TTL", "300"))
+LIST_ANALYSES_MAX_ENTRIES = int(os.getenv("LIST_ANALYSES_MAX_ENTRIES", "256"))
+
+
+def params_key(params: dict) -> tuple:
+    return tuple(sorted((k, str(v)) for k, v in (params or {}).items() if v is not None))
+
+
+class AnalysesCache:
+    """Respuestas de /list_analyses por (usuario, filtros) con TTL; se invalida al cambiar los datos del usuario."""
+
+    def __init__(self, ttl: int, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, owner: str, params: dict):
+        key = (owner, params_key(params))
+        with self._lock:
+            entry = self._items.get(key)
+            if entry is None:
+                return None
+            expires, analyses = entry
+            if expires < time.time():
+                del self._items[key]
+                return None
+            self._items.move_to_end(key)
+            return analyses
+
+    def put(self, owner: str, params: dict, analyses):
+        key = (owner, params_key(params))
+        with self._lock:
+            self._items[key] = (time.time() + self.ttl, analyses)
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_entries:
+                self._items.popitem(last=False)
+
+    def invalidate(self, owner: str):
+        """Descarta todas las respuestas de un usuario (tras borrar, subir o analizar)."""
+        with self._lock:
+            for key in [k for k in self._items if k[0] == owner]:
+                del self._items[key]
+
+
+@st.cache_resource
+def get_analyses_cache() -> AnalysesCache:
+    return AnalysesCache(LIST_ANALYSES_TTL, LIST_ANALYSES_MAX_ENTRIES)
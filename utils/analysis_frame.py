@@ -0,0 +1,62 @@
+# frontend/utils/analysis_frame.py
+"""Normaliza la lista de /list_analyses en un DataFrame columnar para métricas, gráfico y filtros locales."""
+import pandas as pd
+
+# Confidence above which a malignant classification counts as high risk
+HIGH_RISK_CONFIDENCE = 0.75
+ALL_BODY_PARTS = "Todas"
+
+
+def first_analysis(value) -> dict:
+    """El campo 'analysis' llega como dict o como lista de dicts según el endpoint."""
+    if isinstance(value, list):
+        return value[0] if value and isinstance(value[0], dict) else {}
+    return value if isinstance(value, dict) else {}
+
+
+def build_frame(analyses: list) -> pd.DataFrame:
+    """Un solo recorrido en Python para aplanar; fechas y números se convierten de forma vectorizada.
+
+    La columna 'row' apunta al documento original en `analyses`.
+    """
+    details = [first_analysis(a.get("analysis")) for a in analyses]
+    frame = pd.DataFrame({
+        "row": range(len(analyses)),
+        "analysis_id": [a.get("id") for a in analyses],
+        "image_id": [a.get("image_id") for a in analyses],
+        "analysis_date": [a.get("analysis_date") for a in analyses],
+        "body_part": [a.get("body_part") or "" for a in analyses],
+        "classification": [d.get("advance_classification") or "unknown" for d in details],
+        "confidence": [d.get("confidence_level") for d in details],
+    })
+    # Offsets (if any) are normalised to UTC and dropped, so mixed and naive dates compare against plain dates
+    frame["analysis_date"] = pd.to_datetime(frame["analysis_date"], errors="coerce", format="ISO8601", utc=True).dt.tz_localize(None)
+    frame["confidence"] = pd.to_numeric(frame["confidence"], errors="coerce").fillna(0.0).astype("float64")
+    frame["classification"] = frame["classification"].astype(str).str.lower().astype("category")
+    frame["body_part"] = frame["body_part"].astype("category")
+    frame["high_risk"] = frame["classification"].astype(str).str.contains("malignant") & (frame["confidence"] > HIGH_RISK_CONFIDENCE)
+    return frame.sort_values("analysis_date", ascending=False, kind="stable").reset_index(drop=True)
+
+
+def filter_frame(frame: pd.DataFrame, start_date=None, end_date=None, body_part: str = ALL_BODY_PARTS) -> pd.DataFrame:
+    """Filtra por rango de fechas (inclusive) y parte del cuerpo sin volver a llamar al backend."""
+    mask = pd.Series(True, index=frame.index)
+    dates = frame["analysis_date"].dt.normalize()
+    if start_date is not None:
+        mask &= dates >= pd.Timestamp(start_date)
+    if end_date is not None:
+        mask &= dates <= pd.Timestamp(end_date)
+    if body_part != ALL_BODY_PARTS:
+        mask &= frame["body_part"] == body_part
+    return frame[mask]
+
+
+def summary_metrics(frame: pd.DataFrame) -> dict:
+    total = len(frame)
+    high_risk = int(frame["high_risk"].sum())
+    return {
+        "total": total,
+        "high_risk": high_risk,
+        "risk_rate": high_risk / total if total else 0.0,
+        "body_parts": int(frame["body_part"].nunique()),
+    }
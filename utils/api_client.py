@@ -0,0 +1,326 @@
+# frontend/utils/api_client.py
+import json
+import os
+import threading
+import time
+
+import requests
+import streamlit as st
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from utils import perf
+from utils.session import token_claims, token_expiry
+from utils.startup import load_config
+
+load_config()  # BASE_URL may come from .env; pages import this module before anything else runs
+BASE_URL = os.getenv("BASE_URL", "http://localhost:8080")
+
+# Re-exported so pages can handle network errors without importing requests
+RequestException = requests.RequestException
+Timeout = requests.Timeout
+
+# Timeouts (seconds) per backend endpoint
+TIMEOUTS = {
+    "login": 15,
+    "refresh": 15,
+    "register": 15,
+    "upload_image": 60,
+    "upload_init": 15,
+    "upload_chunk": 30,
+    "upload_commit": 60,
+    "start_process": 120,
+    "process_status": 15,
+    "pending_analysis": 30,
+    "get_segmented_image": 30,
+    "get_image": 30,
+    "list_analyses": 30,
+    "list_users_with_images": 30,
+    "delete_image": 30,
+    "delete_analysis": 30,
+}
+
+# Image endpoints: prefer raw bytes, backends that only speak JSON answer with base64 as before
+IMAGE_ACCEPT = "image/webp, image/jpeg, image/png, application/json;q=0.5"
+JSON_ACCEPT = "application/json"
+
+# Only idempotent methods are retried; POSTs (upload, analysis) are never replayed.
+# Chunk PUTs are left out too: utils/chunked_upload.py retries each part itself.
+RETRY_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "DELETE"})
+RETRY_STATUS = (502, 503, 504)
+# Superseded tokens are remembered this long after expiring, for background jobs still holding them
+TOKEN_GRACE_SECONDS = 3600
+
+
+class BackendClient:
+    """Cliente HTTP del backend con pool de conexiones (keep-alive) compartido."""
+
+    def __init__(self, base_url: str, pool_size: int = 20, retries: int = 3, backoff: float = 0.3,
+                 analyses_cache=None):
+        self.base_url = base_url.rstrip("/")
+        # Invalidated from upload and analysis worker threads, so it is resolved up front (see get_client)
+        self.analyses_cache = analyses_cache
+        self.session = requests.Session()
+        retry = Retry(
+            total=retries,
+            connect=retries,
+            read=retries,
+            status=retries,
+            backoff_factor=backoff,
+            status_forcelist=RETRY_STATUS,
+            allowed_methods=RETRY_METHODS,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._identities = {}  # access token -> username, used to key per-user caches
+        self._refresh_tokens = {}  # access token -> refresh token issued with it
+        self._renewed = {}  # superseded access token -> the token that replaced it
+        self._refresh_lock = threading.Lock()
+
+    def _send(self, method: str, endpoint: str, path: str, token: str = None, **kwargs) -> requests.Response:
+        headers = dict(kwargs.pop("headers", None) or {})
+        if token:
+            headers["Authorization"] = f"Bearer {token}"
+        timeout = kwargs.pop("timeout", TIMEOUTS[endpoint])
+        with perf.timed(f"api {endpoint}") as timer:
+            resp = self.session.request(method, f"{self.base_url}{path}", headers=headers, timeout=timeout, **kwargs)
+            if perf.ENABLED:
+                timer.add_bytes(len(resp.content))
+        return resp
+
+    def _request(self, method: str, endpoint: str, path: str, token: str = None, **kwargs) -> requests.Response:
+        """Envía la petición con el token vigente; tras un 401 renueva el token y la repite una vez."""
+        if token:
+            token = self.current_token(token)
+        resp = self._send(method, endpoint, path, token, **kwargs)
+        if resp.status_code == 401 and token:
+            # The backend rejected the request before doing anything, so replaying it (even a POST) is safe
+            renewed = self.refresh_session(token)
+            if renewed:
+                resp = self._send(method, endpoint, path, renewed, **kwargs)
+        return resp
+
+    # --- Auth ---
+    def login(self, username: str, password: str) -> requests.Response:
+        resp = self._request("POST", "login", "/login", json={"username": username, "password": password})
+        if resp.status_code == 200:
+            data = resp.json()
+            self._remember(data.get("access_token"), username, data.get("refresh_token"))
+        return resp
+
+    def _remember(self, token: str, username: str, refresh_token: str = None):
+        self._identities[token] = username
+        if refresh_token:
+            self._refresh_tokens[token] = refresh_token
+
+    def identity(self, token: str) -> str:
+        """Usuario dueño del token (clave de las cachés por usuario): el del login, el `sub` del JWT o el propio token."""
+        return self._identities.get(token) or token_claims(token).get("sub") or token
+
+    def current_token(self, token: str) -> str:
+        """El token más reciente de la cadena de renovaciones que empieza en `token`."""
+        while token in self._renewed:
+            token = self._renewed[token]
+        return token
+
+    def refresh_session(self, token: str):
+        """Renueva el access token con su refresh token; devuelve el nuevo o None si no se puede."""
+        with self._refresh_lock:
+            # Another thread may have renewed it while this one waited for the lock
+            current = self.current_token(token)
+            if current != token:
+                return current
+            refresh_token = self._refresh_tokens.get(token)
+            if not refresh_token:
+                return None
+            try:
+                resp = self._send("POST", "refresh", "/refresh", json={"refresh_token": refresh_token})
+            except requests.RequestException:
+                return None
+            if resp.status_code != 200:
+                self._refresh_tokens.pop(token, None)
+                return None
+            data = resp.json()
+            renewed = data["access_token"]
+            self._remember(renewed, self.identity(token), data.get("refresh_token", refresh_token))
+            self._refresh_tokens.pop(token, None)
+            self._renewed[token] = renewed
+            self._prune_tokens()
+            return renewed
+
+    def _prune_tokens(self):
+        cutoff = time.time() - TOKEN_GRACE_SECONDS
+        for token in [t for t in self._renewed if (token_expiry(t) or cutoff) < cutoff]:
+            self._renewed.pop(token, None)
+            self._identities.pop(token, None)
+
+    def forget_token(self, token: str):
+        """Olvida un token (y sus renovaciones) sin tocar los datos cacheados del usuario."""
+        # Same lock as refresh_session, whose _prune_tokens iterates over _renewed
+        with self._refresh_lock:
+            chain = [token]
+            while chain[-1] in self._renewed:
+                chain.append(self._renewed.pop(chain[-1]))
+            for t in chain:
+                self._identities.pop(t, None)
+                self._refresh_tokens.pop(t, None)
+
+    def logout(self, token: str):
+        """Olvida el token y borra del disco y de memoria los datos cacheados del usuario."""
+        from utils.dedup import get_upload_index
+        from utils.disk_cache import get_disk_cache
+        self.invalidate_user_data(token)
+        get_upload_index().forget_user(self.identity(token))
+        disk = get_disk_cache()
+        if disk is not None:
+            disk.purge_user(self.identity(token))
+        self.forget_token(token)
+
+    def register(self, username: str, password: str) -> requests.Response:
+        return self._request("POST", "register", "/register", json={"username": username, "password": password})
+
+    def invalidate_user_data(self, token: str):
+        """El historial del usuario cambió: descarta las respuestas de /list_analyses cacheadas."""
+        self._analyses_cache().invalidate(self.identity(token))
+
+    def _analyses_cache(self):
+        if self.analyses_cache is None:
+            from utils.analyses_cache import get_analyses_cache
+            self.analyses_cache = get_analyses_cache()
+        return self.analyses_cache
+
+    # --- Images ---
+    def upload_image(self, token: str, files: dict, data: dict) -> requests.Response:
+        resp = self._request("POST", "upload_image", "/upload_image", token, files=files, data=data)
+        if resp.status_code == 200:
+            self.invalidate_user_data(token)
+        return resp
+
+    # --- Chunked, resumable uploads (see utils/chunked_upload.py) ---
+    def upload_init(self, token: str, meta: dict) -> requests.Response:
+        return self._request("POST", "upload_init", "/upload_chunked/init", token, json=meta)
+
+    def upload_chunk(self, token: str, upload_id: str, index: int, data: bytes) -> requests.Response:
+        return self._request("PUT", "upload_chunk", f"/upload_chunked/{upload_id}/{index}", token, data=data,
+                             headers={"Content-Type": "application/octet-stream"})
+
+    def upload_commit(self, token: str, upload_id: str, data: dict) -> requests.Response:
+        resp = self._request("POST", "upload_commit", f"/upload_chunked/{upload_id}/commit", token, data=data)
+        if resp.status_code == 200:
+            self.invalidate_user_data(token)
+        return resp
+
+    def get_segmented_image(self, token: str, image_id: str, binary: bool = True) -> requests.Response:
+        return self._request("GET", "get_segmented_image", f"/get_segmented_image/{image_id}", token,
+                             headers={"Accept": IMAGE_ACCEPT if binary else JSON_ACCEPT})
+
+    def get_image(self, token: str, image_id: str, binary: bool = True) -> requests.Response:
+        """Imagen original por id (el historial la pide solo cuando el usuario la abre)."""
+        return self._request("GET", "get_image", f"/get_image/{image_id}", token,
+                             headers={"Accept": IMAGE_ACCEPT if binary else JSON_ACCEPT})
+
+    def delete_image(self, token: str, image_id: str) -> bool:
+        try:
+            resp = self._request("DELETE", "delete_image", f"/delete_image/{image_id}", token)
+        except requests.RequestException:
+            return False
+        if resp.status_code != 200:
+            return False
+        from utils.dedup import get_upload_index
+        from utils.disk_cache import get_disk_cache
+        from utils.image_cache import get_image_cache
+        get_image_cache().invalidate(image_id)
+        get_upload_index().discard(image_id)
+        disk = get_disk_cache()
+        if disk is not None:
+            disk.delete_resource(image_id)
+        self.invalidate_user_data(token)
+        return True
+
+    # --- Analyses ---
+    def start_process(self, token: str, payload: dict) -> requests.Response:
+        resp = self._request("POST", "start_process", "/start_process", token, json=payload)
+        if resp.status_code == 200:
+            self.invalidate_user_data(token)
+        return resp
+
+    def submit_process(self, token: str, payload: dict) -> requests.Response:
+        """Pide al backend ejecutar el análisis como trabajo (202 + job_id). Backends antiguos responden 200 con el resultado."""
+        resp = self._request("POST", "start_process", "/start_process", token, json=payload,
+                             headers={"Prefer": "respond-async"})
+        if resp.status_code == 200:
+            self.invalidate_user_data(token)
+        return resp
+
+    def process_status(self, token: str, job_id: str) -> requests.Response:
+        resp = self._request("GET", "process_status", f"/process_status/{job_id}", token)
+        if resp.status_code == 200 and resp.json().get("status") == "done":
+            self.invalidate_user_data(token)
+        return resp
+
+    def pending_analysis(self, token: str, etag: str = None) -> requests.Response:
+        """Con `etag`, un backend que lo soporte responde 304 si la cola no cambió."""
+        headers = {"If-None-Match": etag} if etag else None
+        return self._request("GET", "pending_analysis", "/pending_analysis", token, headers=headers)
+
+    def list_analyses(self, token: str, params: dict = None, headers: dict = None) -> requests.Response:
+        return self._request("GET", "list_analyses", "/list_analyses", token, params=params, headers=headers)
+
+    def list_analyses_cached(self, token: str, params: dict = None, refresh: bool = False):
+        """Como list_analyses, pero reutiliza la respuesta mientras no expire ni cambien los datos.
+
+        Devuelve (análisis, None) o (None, mensaje de error).
+        """
+        from utils.analyses_cache import params_key
+        from utils.disk_cache import get_disk_cache
+        cache = self._analyses_cache()
+        owner = self.identity(token)
+        analyses = None if refresh else cache.get(owner, params)
+        if analyses is not None:
+            return analyses, None
+
+        # Revalidate the copy kept on disk from a previous session: unchanged data costs a 304
+        disk = get_disk_cache()
+        resource_id = repr(params_key(params))
+        stored = disk.get(owner, "analyses", resource_id) if disk is not None else None
+        headers = {}
+        if stored and stored["etag"]:
+            headers["If-None-Match"] = stored["etag"]
+        if stored and stored["updated_at"]:
+            headers["If-Modified-Since"] = stored["updated_at"]
+
+        resp = self.list_analyses(token, params, headers=headers)
+        if resp.status_code == 304 and stored:
+            analyses = json.loads(stored["body"])
+        elif resp.status_code == 200:
+            analyses = resp.json()
+            if disk is not None:
+                disk.put(owner, "analyses", resource_id, resp.content,
+                         etag=resp.headers.get("ETag"), updated_at=resp.headers.get("Last-Modified"),
+                         content_type=resp.headers.get("Content-Type"))
+        else:
+            return None, f"Error {resp.status_code}: {resp.text}"
+        cache.put(owner, params, analyses)
+        return analyses, None
+
+    def delete_analysis(self, token: str, analysis_id: str) -> bool:
+        try:
+            resp = self._request("DELETE", "delete_analysis", f"/delete_analysis/{analysis_id}", token)
+        except requests.RequestException:
+            return False
+        if resp.status_code != 200:
+            return False
+        self.invalidate_user_data(token)
+        return True
+
+    def list_users_with_images(self, token: str = None) -> requests.Response:
+        return self._request("GET", "list_users_with_images", "/list_users_with_images", token)
+
+
+@st.cache_resource
+def get_client(base_url: str = BASE_URL) -> BackendClient:
+    """Cliente compartido entre sesiones y reruns (un pool por URL base)."""
+    from utils.analyses_cache import get_analyses_cache
+    return BackendClient(base_url, analyses_cache=get_analyses_cache())
@@ -0,0 +1,92 @@
+# frontend/utils/chunked_upload.py
+"""Subida por partes y reanudable para conexiones móviles inestables.
+
+Protocolo: POST /upload_chunked/init (devuelve las partes ya recibidas), PUT /upload_chunked/{id}/{n}
+por cada parte que falte y POST /upload_chunked/{id}/commit con los metadatos, que lanza la segmentación
+y responde como /upload_image. El upload_id se deriva del usuario y del contenido, así que volver a
+enviar el mismo archivo retoma desde la última parte confirmada.
+"""
+import hashlib
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from utils import perf
+from utils.api_client import RequestException
+
+CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_KB", "256")) * 1024
+# Parts sent at the same time for one file (1 = strictly sequential)
+CHUNK_CONCURRENCY = int(os.getenv("UPLOAD_CHUNK_CONCURRENCY", "2"))
+CHUNK_ATTEMPTS = 3
+
+
+def upload_id_for(username: str, data: bytes) -> str:
+    return hashlib.sha256(username.encode() + b"\0" + data).hexdigest()[:32]
+
+
+def _send_chunk(client, token: str, upload_id: str, index: int, chunk: bytes) -> int:
+    for attempt in range(CHUNK_ATTEMPTS):
+        try:
+            resp = client.upload_chunk(token, upload_id, index, chunk)
+            if resp.status_code == 200:
+                return index
+            error = RequestException(f"Error {resp.status_code} al enviar la parte {index}: {resp.text}")
+        except RequestException as e:
+            error = e
+        if attempt + 1 < CHUNK_ATTEMPTS:
+            time.sleep(0.5 * 2 ** attempt)
+    raise error
+
+
+def chunked_upload(client, token: str, username: str, filename: str, data: bytes, content_type: str,
+                   form_data: dict, chunk_size: int = CHUNK_SIZE, max_workers: int = CHUNK_CONCURRENCY):
+    """Generador: produce ("progress", bytes_confirmados, bytes_totales) y termina con ("done", resultado).
+
+    El resultado tiene la misma forma que utils.uploads.upload_one; si falla la red, incluye
+    "resumable": True y un nuevo intento continúa desde las partes ya confirmadas.
+    """
+    upload_id = upload_id_for(username, data)
+    total_chunks = max(1, -(-len(data) // chunk_size))
+    chunk_len = lambda i: min(chunk_size, len(data) - i * chunk_size)
+
+    try:
+        resp = client.upload_init(token, {
+            "upload_id": upload_id,
+            "filename": filename,
+            "content_type": content_type,
+            "total_size": len(data),
+            "chunk_size": chunk_size,
+            "total_chunks": total_chunks,
+        })
+        if resp.status_code != 200:
+            yield "done", {"status_code": resp.status_code, "json": _json(resp), "text": resp.text}
+            return
+        received = set(resp.json().get("received", []))
+        confirmed = sum(chunk_len(i) for i in received if i < total_chunks)
+        yield "progress", confirmed, len(data)
+
+        missing = [i for i in range(total_chunks) if i not in received]
+        with perf.timed("upload chunks", sum(chunk_len(i) for i in missing)):
+            with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(missing) or 1))) as executor:
+                futures = [
+                    executor.submit(perf.wrap(_send_chunk), client, token, upload_id, i,
+                                    data[i * chunk_size:(i + 1) * chunk_size])
+                    for i in missing
+                ]
+                for future in as_completed(futures):
+                    confirmed += chunk_len(future.result())
+                    yield "progress", confirmed, len(data)
+
+        resp = client.upload_commit(token, upload_id, form_data)
+    except RequestException as e:
+        yield "done", {"status_code": None, "json": None, "resumable": True,
+                       "error": f"Conexión interrumpida ({e}). Vuelve a pulsar el botón para continuar la subida."}
+        return
+    yield "done", {"status_code": resp.status_code, "json": _json(resp), "text": "" if resp.status_code == 200 else resp.text}
+
+
+def _json(resp):
+    try:
+        return resp.json()
+    except ValueError:
+        return None
@@ -0,0 +1,128 @@
+# frontend/utils/dedup.py
+"""Detección local de imágenes repetidas con un hash perceptual (dHash de 64 bits) por usuario.
+
+Antes de subir una imagen se busca en el índice del usuario un hash a distancia de Hamming pequeña; si
+existe, se reutiliza el resultado de aquella subida y no se gasta ni la petición ni el cupo diario.
+El índice vive en memoria (un array uint64 por usuario, búsqueda vectorizada) y se persiste en la caché
+en disco para sobrevivir a reinicios.
+"""
+import json
+import os
+import threading
+from io import BytesIO
+
+import numpy as np
+import streamlit as st
+
+from utils import perf
+from utils.disk_cache import get_disk_cache
+
+# Max differing bits (of 64) for two photos to count as the same upload
+DEDUP_MAX_DISTANCE = int(os.getenv("DEDUP_MAX_DISTANCE", "6"))
+DISK_KIND = "phash"
+# Heavy fields never stored with the remembered upload result
+_DROPPED_FIELDS = ("segmented_image_b64", "image_b64")
+
+_POPCOUNT8 = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def dhash(data: bytes, hash_size: int = 8) -> int:
+    """dHash: gris reducido a (n+1)×n y un bit por cada par de píxeles vecinos (¿el izquierdo es más claro?)."""
+    from PIL import Image
+
+    image = Image.open(BytesIO(data))
+    image.draft("L", (hash_size * 8, hash_size * 8))  # JPEG: decode directly at a fraction of the size
+    pixels = np.asarray(image.convert("L").resize((hash_size + 1, hash_size), Image.LANCZOS), dtype=np.int16)
+    bits = (pixels[:, 1:] > pixels[:, :-1]).ravel()
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+def hamming_distances(hashes: np.ndarray, value: int) -> np.ndarray:
+    """Distancia de Hamming de `value` a cada hash (uint64), vectorizada."""
+    xor = np.bitwise_xor(hashes, np.uint64(value))
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(xor)
+    return _POPCOUNT8[xor.view(np.uint8)].reshape(-1, 8).sum(axis=1)
+
+
+class UserHashIndex:
+    """Hashes de las subidas de un usuario y el resultado de cada una."""
+
+    def __init__(self, entries=()):
+        entries = list(entries)  # (hash, image_id, result)
+        self.hashes = np.array([value for value, _, _ in entries], dtype=np.uint64)
+        self.image_ids = [image_id for _, image_id, _ in entries]
+        self.results = [result for _, _, result in entries]
+
+    def add(self, value: int, image_id: str, result: dict):
+        if image_id in self.image_ids:
+            return
+        self.hashes = np.append(self.hashes, np.uint64(value))
+        self.image_ids.append(image_id)
+        self.results.append(result)
+
+    def discard(self, image_id: str) -> bool:
+        if image_id not in self.image_ids:
+            return False
+        i = self.image_ids.index(image_id)
+        self.hashes = np.delete(self.hashes, i)
+        del self.image_ids[i]
+        del self.results[i]
+        return True
+
+    def nearest(self, value: int, max_distance: int):
+        """(distancia, image_id, resultado) de la subida más parecida dentro del umbral, o None."""
+        if not self.image_ids:
+            return None
+        distances = hamming_distances(self.hashes, value)
+        best = int(np.argmin(distances))
+        if distances[best] > max_distance:
+            return None
+        return int(distances[best]), self.image_ids[best], self.results[best]
+
+
+class UploadIndex:
+    """Índices por usuario; se cargan del disco la primera vez que se consultan."""
+
+    def __init__(self):
+        self._users = {}
+        self._lock = threading.Lock()
+
+    def _user(self, owner: str) -> UserHashIndex:
+        index = self._users.get(owner)
+        if index is None:
+            disk = get_disk_cache()
+            rows = disk.items(owner, DISK_KIND) if disk is not None else []
+            entries = [(int(entry["hash"]), image_id, entry["result"])
+                       for image_id, entry in ((image_id, json.loads(body)) for image_id, body in rows)]
+            index = self._users[owner] = UserHashIndex(entries)
+        return index
+
+    @perf.timed_fn("dedup lookup")
+    def find(self, owner: str, value: int, max_distance: int = DEDUP_MAX_DISTANCE):
+        with self._lock:
+            return self._user(owner).nearest(value, max_distance)
+
+    def add(self, owner: str, value: int, image_id: str, result_json: dict):
+        result = {k: v for k, v in (result_json or {}).items() if k not in _DROPPED_FIELDS}
+        with self._lock:
+            self._user(owner).add(value, image_id, result)
+        disk = get_disk_cache()
+        if disk is not None:
+            disk.put(owner, DISK_KIND, str(image_id), json.dumps({"hash": str(value), "result": result}).encode(),
+                     content_type="application/json")
+
+    def discard(self, image_id: str):
+        """La imagen se borró en el backend: deja de contar como subida previa para cualquier usuario."""
+        with self._lock:
+            for index in self._users.values():
+                index.discard(str(image_id))
+
+    def forget_user(self, owner: str):
+        with self._lock:
+            self._users.pop(owner, None)
+
+
+@st.cache_resource
+def get_upload_index() -> UploadIndex:
+    return UploadIndex()
@@ -0,0 +1,134 @@
+# frontend/utils/disk_cache.py
+"""Caché persistente en disco (SQLite) de análisis e imágenes por usuario, con límite de tamaño y LRU.
+
+Sobrevive a reinicios y a sesiones nuevas: un usuario que vuelve lee su historial e imágenes del disco
+y solo revalida el listado con If-None-Match / If-Modified-Since.
+"""
+import os
+import sqlite3
+import threading
+import time
+
+import streamlit as st
+
+DISK_CACHE_ENABLED = os.getenv("DISK_CACHE_ENABLED", "1").lower() in ("1", "true", "yes")
+DISK_CACHE_DIR = os.path.expanduser(os.getenv("DISK_CACHE_DIR", "~/.cache/melia"))
+DISK_CACHE_MAX_MB = int(os.getenv("DISK_CACHE_MAX_MB", "512"))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS resources (
+    owner TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    resource_id TEXT NOT NULL,
+    etag TEXT,
+    updated_at TEXT,
+    content_type TEXT,
+    body BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    last_access REAL NOT NULL,
+    PRIMARY KEY (owner, kind, resource_id)
+);
+CREATE INDEX IF NOT EXISTS resources_last_access ON resources (last_access);
+"""
+
+
+class DiskCache:
+    def __init__(self, path: str, max_bytes: int):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM resources").fetchone()[0]
+
+    def get(self, owner: str, kind: str, resource_id: str):
+        """Devuelve {'body', 'etag', 'updated_at', 'content_type'} o None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT body, etag, updated_at, content_type FROM resources WHERE owner=? AND kind=? AND resource_id=?",
+                (owner, kind, resource_id),
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute(
+                "UPDATE resources SET last_access=? WHERE owner=? AND kind=? AND resource_id=?",
+                (time.time(), owner, kind, resource_id),
+            )
+        return {"body": row[0], "etag": row[1], "updated_at": row[2], "content_type": row[3]}
+
+    def put(self, owner: str, kind: str, resource_id: str, body: bytes,
+            etag: str = None, updated_at: str = None, content_type: str = None):
+        size = len(body)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._conn.execute(
+                "SELECT size FROM resources WHERE owner=? AND kind=? AND resource_id=?", (owner, kind, resource_id)
+            ).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO resources VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (owner, kind, resource_id, etag, updated_at, content_type, sqlite3.Binary(body), size, time.time()),
+            )
+            self._total += size - (old[0] if old else 0)
+            self._evict()
+
+    def items(self, owner: str, kind: str) -> list:
+        """Todas las filas (resource_id, body) de un usuario y tipo (p. ej. para reconstruir un índice)."""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT resource_id, body FROM resources WHERE owner=? AND kind=?", (owner, kind)
+            ).fetchall()
+
+    def delete(self, owner: str, kind: str, resource_id: str):
+        self._delete_where("owner=? AND kind=? AND resource_id=?", (owner, kind, resource_id))
+
+    def delete_resource(self, resource_id: str):
+        """Borra todas las variantes de un recurso (p. ej. una imagen eliminada)."""
+        self._delete_where("resource_id=?", (resource_id,))
+
+    def purge_user(self, owner: str):
+        """Elimina todo lo cacheado de un usuario (al cerrar sesión)."""
+        self._delete_where("owner=?", (owner,))
+
+    def _delete_where(self, where: str, params: tuple):
+        # SELECT + DELETE in one transaction instead of DELETE ... RETURNING, which needs SQLite >= 3.35
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                size = self._conn.execute(f"SELECT COALESCE(SUM(size), 0) FROM resources WHERE {where}", params).fetchone()[0]
+                self._conn.execute(f"DELETE FROM resources WHERE {where}", params)
+                self._conn.execute("COMMIT")
+            except sqlite3.Error:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._total -= size
+
+    def _evict(self):
+        # Caller holds the lock; drop least recently used rows until under budget
+        while self._total > self.max_bytes:
+            rows = self._conn.execute(
+                "SELECT owner, kind, resource_id, size FROM resources ORDER BY last_access LIMIT 32"
+            ).fetchall()
+            if not rows:
+                self._total = 0
+                return
+            for owner, kind, resource_id, size in rows:
+                self._conn.execute(
+                    "DELETE FROM resources WHERE owner=? AND kind=? AND resource_id=?", (owner, kind, resource_id)
+                )
+                self._total -= size
+                if self._total <= self.max_bytes:
+                    return
+
+
+@st.cache_resource
+def get_disk_cache():
+    """Caché en disco compartida por el proceso, o None si está desactivada o el disco no es usable."""
+    if not DISK_CACHE_ENABLED:
+        return None
+    try:
+        return DiskCache(os.path.join(DISK_CACHE_DIR, "cache.sqlite3"), DISK_CACHE_MAX_MB * 1024 * 1024)
+    except (OSError, sqlite3.Error):
+        return None
@@ -0,0 +1,187 @@
+# frontend/utils/evolution.py
+"""Evolución de cada lesión a lo largo del historial (criterio E) a partir de la geometría de segmentación.
+
+Las imágenes de un usuario se agrupan por parte del cuerpo y, dentro de ella, por lesión (centroide más
+cercano). Cada par de imágenes consecutivas de una lesión se compara tras alinear las máscaras por
+centroide y escala: cambio de área, cambio de forma (1 - IoU) y, si la imagen original ya está en caché,
+cambio de color. Los deltas se cachean por par, así que una subida nueva solo calcula su par.
+"""
+import functools
+import json
+import os
+from datetime import datetime
+
+import numpy as np
+import streamlit as st
+
+from utils import perf
+from utils.abcde import color_shares, lesion_pixels
+from utils.image_cache import ORIGINAL, get_image_cache
+from utils.overlay import parse_segmentation
+
+# Images of the same body part whose lesion centroids are closer than this (fraction of the image) are one lesion
+LESION_MATCH_DISTANCE = float(os.getenv("LESION_MATCH_DISTANCE", "0.25"))
+# Deltas between consecutive images above which the lesion is flagged as changing
+EVOLUTION_AREA_CHANGE = float(os.getenv("EVOLUTION_AREA_CHANGE", "0.2"))
+EVOLUTION_SHAPE_CHANGE = float(os.getenv("EVOLUTION_SHAPE_CHANGE", "0.2"))
+EVOLUTION_COLOR_CHANGE = float(os.getenv("EVOLUTION_COLOR_CHANGE", "0.25"))
+# Side of the canvas where both masks are registered (centroid at the centre, same equivalent radius)
+REGISTRATION_CANVAS = 128
+
+
+def polygon_area_centroid(polygon: np.ndarray):
+    """Área y centroide de un polígono (fórmula del área de Gauss, vectorizada)."""
+    x, y = polygon[:, 0], polygon[:, 1]
+    xn, yn = np.roll(x, -1), np.roll(y, -1)
+    cross = x * yn - xn * y
+    area = cross.sum() / 2
+    if abs(area) < 1e-9:
+        return 0.0, polygon.mean(axis=0)
+    cx = ((x + xn) * cross).sum() / (6 * area)
+    cy = ((y + yn) * cross).sum() / (6 * area)
+    return abs(area), np.array([cx, cy])
+
+
+def lesion_geometry(segmentation):
+    """Polígono principal de la segmentación, normalizado al tamaño de la imagen; None si no hay geometría."""
+    size, polygons = parse_segmentation(segmentation)
+    if not polygons:
+        return None
+    measured = [(polygon_area_centroid(p), p) for p in polygons]
+    (area, centroid), polygon = max(measured, key=lambda m: m[0][0])
+    if area <= 0:
+        return None
+    # Without the reference size, the polygon's own bounding box is the best available frame
+    width, height = size or (np.ptp(polygon[:, 0]) or 1.0, np.ptp(polygon[:, 1]) or 1.0)
+    scale = np.array([width, height])
+    return {
+        "polygon": polygon / scale,
+        "centroid": centroid / scale,
+        "area_fraction": area / (width * height),
+    }
+
+
+@functools.lru_cache(maxsize=8192)
+def _geometry_from_json(segmentation_json: str):
+    return lesion_geometry(json.loads(segmentation_json))
+
+
+def registered_mask(polygon: np.ndarray) -> np.ndarray:
+    """Máscara del polígono centrado en el lienzo y escalado a un radio equivalente fijo."""
+    from PIL import Image, ImageDraw
+
+    area, centroid = polygon_area_centroid(polygon)
+    radius = REGISTRATION_CANVAS / 4
+    points = (polygon - centroid) * (radius / np.sqrt(area / np.pi)) + REGISTRATION_CANVAS / 2
+    mask = Image.new("L", (REGISTRATION_CANVAS, REGISTRATION_CANVAS), 0)
+    ImageDraw.Draw(mask).polygon([tuple(p) for p in points], fill=255)
+    return np.asarray(mask) > 0
+
+
+@st.cache_data(show_spinner=False, max_entries=4096)
+def pair_delta(previous_id: str, current_id: str, previous_json: str, current_json: str,
+               previous_colors: tuple = None, current_colors: tuple = None) -> dict:
+    """Cambios entre dos imágenes consecutivas de una lesión (cacheado por par)."""
+    previous, current = _geometry_from_json(previous_json), _geometry_from_json(current_json)
+    mask_a, mask_b = registered_mask(previous["polygon"]), registered_mask(current["polygon"])
+    iou = np.count_nonzero(mask_a & mask_b) / max(np.count_nonzero(mask_a | mask_b), 1)
+    color_change = None
+    if previous_colors and current_colors:
+        # Total variation distance between the reference-colour distributions
+        color_change = float(np.abs(np.array(previous_colors) - np.array(current_colors)).sum() / 2)
+    return {
+        "area_change": float(current["area_fraction"] / previous["area_fraction"] - 1),
+        "shape_change": float(1 - iou),
+        "color_change": color_change,
+    }
+
+
+@st.cache_data(show_spinner=False, max_entries=1024)
+def _lesion_colors(image_id: str, segmentation_json: str, _image) -> tuple:
+    size, polygons = parse_segmentation(json.loads(segmentation_json))
+    image, mask = lesion_pixels(_image, polygons, size)
+    if not mask.any():
+        return None
+    return tuple(float(share) for share in color_shares(np.asarray(image)[mask]).values())
+
+
+def lesion_colors(image_id: str, segmentation_json: str):
+    """Distribución de colores de la lesión si la imagen original ya está en memoria; nunca la descarga."""
+    image = get_image_cache().get(image_id, ORIGINAL)
+    if image is None:
+        return None
+    return _lesion_colors(str(image_id), segmentation_json, image)
+
+
+def _parse_date(value):
+    try:
+        return datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
+
+
+@perf.timed_fn("evolución lesiones")
+def lesion_tracks(analyses: list) -> list:
+    """Series por lesión, de la más antigua a la más reciente, con el delta de cada imagen respecto a la anterior."""
+    entries = []
+    for doc in analyses:
+        segmentation = doc.get("segmentation_result")
+        date = _parse_date(doc.get("analysis_date"))
+        if not segmentation or not doc.get("image_id") or date is None:
+            continue
+        segmentation_json = segmentation if isinstance(segmentation, str) else json.dumps(segmentation, sort_keys=True)
+        geometry = _geometry_from_json(segmentation_json)
+        if geometry is None:
+            continue
+        entries.append({
+            "image_id": str(doc["image_id"]),
+            "date": date,
+            "body_part": doc.get("body_part") or "",
+            "segmentation_json": segmentation_json,
+            **geometry,
+        })
+    entries.sort(key=lambda e: e["date"])
+
+    tracks = []
+    for entry in entries:
+        candidates = [t for t in tracks if t["body_part"] == entry["body_part"]]
+        if candidates:
+            distances = [np.linalg.norm(t["points"][-1]["centroid"] - entry["centroid"]) for t in candidates]
+            nearest = int(np.argmin(distances))
+            if distances[nearest] <= LESION_MATCH_DISTANCE:
+                candidates[nearest]["points"].append(entry)
+                continue
+        tracks.append({"body_part": entry["body_part"], "points": [entry]})
+
+    for track in tracks:
+        points = track["points"]
+        points[0]["delta"] = None
+        for previous, current in zip(points, points[1:]):
+            current["delta"] = pair_delta(
+                previous["image_id"], current["image_id"],
+                previous["segmentation_json"], current["segmentation_json"],
+                lesion_colors(previous["image_id"], previous["segmentation_json"]),
+                lesion_colors(current["image_id"], current["segmentation_json"]),
+            )
+        track["changing"] = any(_is_change(p["delta"]) for p in points[1:])
+    return tracks
+
+
+def _is_change(delta: dict) -> bool:
+    return (abs(delta["area_change"]) > EVOLUTION_AREA_CHANGE
+            or delta["shape_change"] > EVOLUTION_SHAPE_CHANGE
+            or (delta["color_change"] or 0) > EVOLUTION_COLOR_CHANGE)
+
+
+def evolution_label(track: dict) -> str:
+    """Resumen para el criterio E (mismo registro que 'Evaluación de la Evolución')."""
+    points = track["points"]
+    if len(points) < 2:
+        return "Una sola imagen: sin comparación disponible"
+    total_area = points[-1]["area_fraction"] / points[0]["area_fraction"] - 1
+    last = points[-1]["delta"]
+    parts = [f"área {total_area:+.0%} desde {points[0]['date']:%d/%m/%Y}", f"forma {last['shape_change']:.0%}"]
+    if last["color_change"] is not None:
+        parts.append(f"color {last['color_change']:.0%}")
+    prefix = "⚠️ Cambios notables" if track["changing"] else "Estable"
+    return f"{prefix} ({', '.join(parts)})"
@@ -0,0 +1,91 @@
+# frontend/utils/image_cache.py
+import os
+import threading
+from collections import OrderedDict
+
+import streamlit as st
+
+# Memory budget for decoded images shared by every session of this server process
+IMAGE_CACHE_MAX_MB = int(os.getenv("IMAGE_CACHE_MAX_MB", "256"))
+
+# Known variants
+ORIGINAL = "original"
+SEGMENTED = "segmented"
+
+
+def image_nbytes(image) -> int:
+    """Tamaño aproximado en memoria de una imagen PIL decodificada."""
+    return image.width * image.height * len(image.getbands())
+
+
+class ImageCache:
+    """Caché LRU de imágenes decodificadas, indexada por (image_id, variante) y limitada en bytes."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, image_id: str, variant: str):
+        key = (str(image_id), variant)
+        with self._lock:
+            entry = self._items.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, image_id: str, variant: str, image):
+        key = (str(image_id), variant)
+        size = image_nbytes(image)
+        if size > self.max_bytes:
+            return image  # never cache something that would flush the whole budget
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self.current_bytes -= old[1]
+            self._items[key] = (image, size)
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes:
+                _, (_, evicted_size) = self._items.popitem(last=False)
+                self.current_bytes -= evicted_size
+                self.evictions += 1
+        return image
+
+    def get_or_load(self, image_id: str, variant: str, loader):
+        """Devuelve la imagen cacheada o llama a `loader()` (que devuelve una imagen PIL) y la guarda."""
+        image = self.get(image_id, variant)
+        if image is None:
+            image = loader()
+            image.load()
+            self.put(image_id, variant, image)
+        return image
+
+    def invalidate(self, image_id: str):
+        """Elimina todas las variantes de una imagen (p. ej. tras borrarla en el backend)."""
+        image_id = str(image_id)
+        with self._lock:
+            for key in [k for k in self._items if k[0] == image_id]:
+                self.current_bytes -= self._items.pop(key)[1]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._items),
+                "bytes": self.current_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+@st.cache_resource
+def get_image_cache() -> ImageCache:
+    return ImageCache(IMAGE_CACHE_MAX_MB * 1024 * 1024)
@@ -0,0 +1,123 @@
+# frontend/utils/images.py
+import base64
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from io import BytesIO
+
+from utils import perf
+from utils.api_client import RequestException
+from utils.disk_cache import get_disk_cache
+from utils.image_cache import ORIGINAL, SEGMENTED, get_image_cache
+
+# Max number of images downloaded at the same time
+IMAGE_FETCH_CONCURRENCY = int(os.getenv("IMAGE_FETCH_CONCURRENCY", "8"))
+
+# variant -> (client method, JSON field, label used in messages)
+_VARIANT_SOURCES = {
+    SEGMENTED: ("get_segmented_image", "segmented_image_b64", "segmentada"),
+    ORIGINAL: ("get_image", "image_b64", "original"),
+}
+
+
+def is_binary_image(resp) -> bool:
+    return resp.headers.get("Content-Type", "").startswith("image/")
+
+
+def image_response_bytes(resp, field: str):
+    """Bytes codificados (JPEG/PNG/...) de una respuesta binaria (image/*) o del JSON base64 de backends antiguos."""
+    if is_binary_image(resp):
+        # resp.content is already the encoded image: no JSON parse and no base64 copy
+        return resp.content
+    b64_data = resp.json().get(field)
+    return base64.b64decode(b64_data) if b64_data else None
+
+
+def decode_image_bytes(data: bytes):
+    from PIL import Image  # deferred: pages that never decode don't pay the import
+
+    image = Image.open(BytesIO(data))
+    image.load()
+    return image
+
+
+def decode_image_response(resp, field: str):
+    """Decodifica la imagen de la respuesta; None si la respuesta JSON no trae la imagen."""
+    data = image_response_bytes(resp, field)
+    return decode_image_bytes(data) if data else None
+
+
+def fetch_image(client, token: str, image_id: str, variant: str = SEGMENTED, caches=None) -> dict:
+    """Descarga y decodifica una variante de la imagen. Nunca lanza excepciones: el error va en el resultado.
+
+    `caches` es (caché en memoria, caché en disco); desde hilos de trabajo hay que pasarlo ya resuelto,
+    porque los getters de st.cache_resource necesitan el contexto del script.
+    """
+    cache, disk = caches if caches is not None else (get_image_cache(), get_disk_cache())
+    cached = cache.get(image_id, variant)
+    if cached is not None:
+        return {"status": "ok", "image": cached}
+
+    # Images never change for a given id, so a copy on disk needs no revalidation
+    owner = client.identity(token)
+    stored = disk.get(owner, variant, str(image_id)) if disk is not None else None
+    if stored:
+        try:
+            with perf.timed(f"decode {variant} (disco)"):
+                image = decode_image_bytes(stored["body"])
+            return {"status": "ok", "image": cache.put(image_id, variant, image)}
+        except Exception:
+            disk.delete(owner, variant, str(image_id))
+
+    method, field, label = _VARIANT_SOURCES[variant]
+    try:
+        r_img = getattr(client, method)(token, image_id)
+    except RequestException as e:
+        return {"status": "error", "message": f"Error de red al obtener la imagen {label}: {e}"}
+
+    if r_img.status_code == 404:
+        return {"status": "missing", "message": f"Imagen {label} para ID {image_id} no encontrada."}
+    if r_img.status_code != 200:
+        return {"status": "error", "message": f"Error {r_img.status_code} al obtener imagen {label}: {r_img.text}"}
+
+    try:
+        data = image_response_bytes(r_img, field)
+        if not data:
+            return {"status": "missing", "message": f"No se encontró la imagen {label}."}
+        with perf.timed(f"decode {variant}"):
+            image = decode_image_bytes(data)  # decode here, in the worker thread
+    except Exception as e:
+        return {"status": "error", "message": f"Error decoding or displaying {variant} image: {e}"}
+    if disk is not None:
+        disk.put(owner, variant, str(image_id), data, content_type=r_img.headers.get("Content-Type"))
+    return {"status": "ok", "image": cache.put(image_id, variant, image)}
+
+
+def decode_b64_image(image_id: str, variant: str, b64_data: str):
+    """Decodifica una imagen base64 pasando por la caché compartida (sin caché si no hay image_id)."""
+    def load():
+        with perf.timed(f"decode {variant}"):
+            return decode_image_bytes(base64.b64decode(b64_data))
+
+    if not image_id:
+        return load()
+    return get_image_cache().get_or_load(image_id, variant, load)
+
+
+def prefetch_images(client, token: str, keys, max_workers: int = IMAGE_FETCH_CONCURRENCY):
+    """Descarga varias (image_id, variante) en paralelo y devuelve (clave, resultado) a medida que terminan."""
+    keys = list(dict.fromkeys(keys))
+    if not keys:
+        return
+    caches = (get_image_cache(), get_disk_cache())  # resolved here, in the script thread
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(keys)))) as executor:
+        futures = {executor.submit(perf.wrap(fetch_image), client, token, image_id, variant, caches): (image_id, variant)
+                   for image_id, variant in keys}
+        for future in as_completed(futures):
+            yield futures[future], future.result()
+
+
+def prefetch_segmented_images(client, token: str, image_ids, max_workers: int = IMAGE_FETCH_CONCURRENCY):
+    """Descarga varias imágenes segmentadas en paralelo y devuelve (image_id, resultado) a medida que terminan."""
+    keys = [(image_id, SEGMENTED) for image_id in image_ids]
+    for (image_id, _), result in prefetch_images(client, token, keys, max_workers):
+        yield image_id, result
@@ -0,0 +1,214 @@
+# frontend/utils/inference.py
+"""Clientes del modelo de segmentación de primera etapa con inferencia por lotes.
+
+Todos devuelven el formato de Roboflow (`{"image": {...}, "predictions": [{..., "points": [...]}]}`), el mismo
+`segmentation_result` que /upload_image, así que utils.overlay y utils.abcde los consumen sin cambios.
+
+Backend elegido con INFERENCE_BACKEND:
+    roboflow  API alojada (ROBOFLOW_API_KEY, INFERENCE_MODEL_ID); por defecto
+    onnx      modelo local con ONNX Runtime (INFERENCE_ONNX_MODEL), opcional
+    local     umbral de Otsu en NumPy, sin dependencias: desarrollo offline y benchmarks
+
+La página de subida lo usa como respaldo cuando /upload_image no responde (INFERENCE_FALLBACK).
+"""
+import base64
+import os
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from io import BytesIO
+
+import numpy as np
+import requests
+import streamlit as st
+from requests.adapters import HTTPAdapter
+
+from utils import perf
+
+INFERENCE_BACKEND = os.getenv("INFERENCE_BACKEND", "roboflow").lower()
+INFERENCE_MODEL_ID = os.getenv("INFERENCE_MODEL_ID", "melanoma-detection-2/6")
+ROBOFLOW_API_URL = os.getenv("ROBOFLOW_API_URL", "https://outline.roboflow.com")
+INFERENCE_ONNX_MODEL = os.getenv("INFERENCE_ONNX_MODEL", "")
+# Images in flight at the same time in infer_many (and connections kept in the pool)
+INFERENCE_CONCURRENCY = int(os.getenv("INFERENCE_CONCURRENCY", "4"))
+INFERENCE_TIMEOUT = int(os.getenv("INFERENCE_TIMEOUT", "60"))
+# Segment on the upload page with this client when the backend cannot be reached
+INFERENCE_FALLBACK = os.getenv("INFERENCE_FALLBACK", "1").lower() in ("1", "true", "yes")
+# Vertices of the polygons traced from local masks
+POLYGON_POINTS = 64
+
+
+def mask_to_result(mask: np.ndarray, image_size, class_name: str = "lesion", confidence: float = 1.0) -> dict:
+    """Resultado con formato Roboflow a partir de una máscara booleana (alto × ancho).
+
+    El contorno se traza por rayos desde el centroide (la lesión se asume aproximadamente estrellada),
+    escalado de la resolución de la máscara a `image_size`.
+    """
+    width, height = image_size
+    result = {"image": {"width": width, "height": height}, "predictions": []}
+    ys, xs = np.nonzero(mask)
+    if xs.size < 16:
+        return result
+    sx, sy = width / mask.shape[1], height / mask.shape[0]
+    cx, cy = xs.mean(), ys.mean()
+    angles = np.arctan2(ys - cy, xs - cx)
+    radii = np.hypot(ys - cy, xs - cx)
+    bins = ((angles + np.pi) / (2 * np.pi) * POLYGON_POINTS).astype(np.int64) % POLYGON_POINTS
+    # Farthest mask pixel in each angular sector
+    reach = np.zeros(POLYGON_POINTS)
+    np.maximum.at(reach, bins, radii)
+    theta = (np.arange(POLYGON_POINTS) + 0.5) / POLYGON_POINTS * 2 * np.pi - np.pi
+    px = (cx + reach * np.cos(theta)) * sx
+    py = (cy + reach * np.sin(theta)) * sy
+    result["predictions"].append({
+        "x": float(cx * sx),
+        "y": float(cy * sy),
+        "width": float((xs.max() - xs.min() + 1) * sx),
+        "height": float((ys.max() - ys.min() + 1) * sy),
+        "confidence": float(confidence),
+        "class": class_name,
+        "points": [{"x": round(float(x), 1), "y": round(float(y), 1)} for x, y in zip(px, py)],
+    })
+    return result
+
+
+class InferenceClient(ABC):
+    """Interfaz común: `infer` para una imagen y `infer_many` para lotes con concurrencia acotada."""
+
+    name = "base"
+
+    @abstractmethod
+    def infer(self, data: bytes) -> dict:
+        """Segmentación de una imagen codificada, con el formato de Roboflow."""
+
+    def _infer_timed(self, data: bytes) -> dict:
+        """Nunca lanza excepciones: el error va en el resultado, junto con el tiempo de la imagen."""
+        start = time.perf_counter()
+        try:
+            with perf.timed(f"inferencia {self.name}", len(data)):
+                prediction = self.infer(data)
+            return {"status": "ok", "prediction": prediction, "ms": (time.perf_counter() - start) * 1000}
+        except Exception as e:
+            return {"status": "error", "message": f"Error de inferencia ({self.name}): {e}",
+                    "ms": (time.perf_counter() - start) * 1000}
+
+    def infer_many(self, items: dict, max_workers: int = INFERENCE_CONCURRENCY):
+        """Segmenta varias imágenes ({clave: bytes}) y devuelve (clave, resultado) a medida que terminan."""
+        if not items:
+            return
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(items)))) as executor:
+            futures = {executor.submit(perf.wrap(self._infer_timed), data): key for key, data in items.items()}
+            for future in as_completed(futures):
+                yield futures[future], future.result()
+
+
+class RoboflowClient(InferenceClient):
+    """API alojada de Roboflow (la misma llamada que InferenceHTTPClient.infer en test.ipynb)."""
+
+    name = "roboflow"
+
+    def __init__(self, api_key: str, model_id: str = INFERENCE_MODEL_ID, api_url: str = ROBOFLOW_API_URL,
+                 pool_size: int = INFERENCE_CONCURRENCY):
+        if not api_key:
+            raise ValueError("Falta ROBOFLOW_API_KEY para usar el backend de inferencia 'roboflow'")
+        self.url = f"{api_url.rstrip('/')}/{model_id}"
+        self.api_key = api_key
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def infer(self, data: bytes) -> dict:
+        resp = self.session.post(self.url, params={"api_key": self.api_key}, data=base64.b64encode(data),
+                                 headers={"Content-Type": "application/x-www-form-urlencoded"},
+                                 timeout=INFERENCE_TIMEOUT)
+        resp.raise_for_status()
+        return resp.json()
+
+
+class LocalThresholdSegmenter(InferenceClient):
+    """Segmentación de referencia en CPU: la región más oscura según el umbral de Otsu."""
+
+    name = "local"
+
+    def __init__(self, max_edge: int = 256):
+        self.max_edge = max_edge
+
+    @staticmethod
+    def otsu_threshold(gray: np.ndarray) -> int:
+        hist = np.bincount(gray.ravel(), minlength=256).astype(np.float64)
+        weights = np.cumsum(hist)
+        means = np.cumsum(hist * np.arange(256))
+        total_weight, total_mean = weights[-1], means[-1]
+        background = total_weight - weights
+        with np.errstate(divide="ignore", invalid="ignore"):
+            between = (total_mean * weights - means * total_weight) ** 2 / (weights * background)
+        return int(np.nanargmax(between[:-1]))
+
+    def infer(self, data: bytes) -> dict:
+        from PIL import Image
+
+        image = Image.open(BytesIO(data))
+        size = image.size
+        gray = image.convert("L")
+        gray.thumbnail((self.max_edge, self.max_edge))
+        pixels = np.asarray(gray)
+        mask = pixels <= self.otsu_threshold(pixels)
+        return mask_to_result(mask, size, confidence=float(mask.mean() > 0))
+
+
+class OnnxSegmenter(InferenceClient):
+    """Modelo de segmentación local con ONNX Runtime (entrada NCHW float32 en [0, 1], salida máscara 1×1×H×W)."""
+
+    name = "onnx"
+
+    def __init__(self, model_path: str, threshold: float = 0.5):
+        try:
+            import onnxruntime
+        except ImportError as e:
+            raise ImportError("El backend 'onnx' necesita onnxruntime (pip install onnxruntime)") from e
+        # One session is thread-safe for run(); infer_many shares it between workers
+        self.session = onnxruntime.InferenceSession(model_path, providers=["CPUExecutionProvider"])
+        model_input = self.session.get_inputs()[0]
+        self.input_name = model_input.name
+        height, width = model_input.shape[2], model_input.shape[3]
+        self.input_size = (width if isinstance(width, int) else 256, height if isinstance(height, int) else 256)
+        self.threshold = threshold
+
+    def infer(self, data: bytes) -> dict:
+        from PIL import Image
+
+        image = Image.open(BytesIO(data))
+        size = image.size
+        batch = np.asarray(image.convert("RGB").resize(self.input_size), dtype=np.float32) / 255.0
+        batch = batch.transpose(2, 0, 1)[None]
+        probabilities = self.session.run(None, {self.input_name: batch})[0][0, 0]
+        mask = probabilities >= self.threshold
+        confidence = float(probabilities[mask].mean()) if mask.any() else 0.0
+        return mask_to_result(mask, size, confidence=confidence)
+
+
+def make_inference_client(backend: str = INFERENCE_BACKEND) -> InferenceClient:
+    if backend == "onnx":
+        return OnnxSegmenter(INFERENCE_ONNX_MODEL)
+    if backend == "local":
+        return LocalThresholdSegmenter()
+    if backend == "roboflow":
+        return RoboflowClient(os.getenv("ROBOFLOW_API_KEY", ""))
+    raise ValueError(f"INFERENCE_BACKEND desconocido: {backend}")
+
+
+@st.cache_resource
+def get_inference_client(backend: str = INFERENCE_BACKEND) -> InferenceClient:
+    """Cliente compartido entre sesiones (un pool de conexiones o una sesión ONNX por proceso)."""
+    return make_inference_client(backend)
+
+
+def fallback_inference_client():
+    """Cliente para segmentar sin el backend; None si está desactivado o el backend elegido no está disponible."""
+    if not INFERENCE_FALLBACK:
+        return None
+    try:
+        return get_inference_client()
+    except (ValueError, ImportError, OSError):
+        return None  # e.g. no ROBOFLOW_API_KEY or onnxruntime not installed
@@ -0,0 +1,185 @@
+# frontend/utils/jobs.py
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import streamlit as st
+
+from utils.api_client import RequestException, Timeout
+
+# Background workers shared by every session running advanced analyses
+ANALYSIS_WORKERS = int(os.getenv("ANALYSIS_WORKERS", "4"))
+# Overall deadline for a server-side job, polled with short requests
+ANALYSIS_JOB_DEADLINE = int(os.getenv("ANALYSIS_JOB_DEADLINE", "900"))
+ANALYSIS_POLL_INTERVAL = float(os.getenv("ANALYSIS_POLL_INTERVAL", "2"))
+# Default number of images analysed at the same time by a batch
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "3"))
+# Finished jobs nobody picked up are dropped after this many seconds
+JOB_RETENTION_SECONDS = int(os.getenv("JOB_RETENTION_SECONDS", "3600"))
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+STATUS_LABELS = {
+    QUEUED: "⏳ En cola",
+    RUNNING: "⚙️ En proceso",
+    DONE: "✅ Completado",
+    FAILED: "❌ Falló",
+}
+
+
+class Job:
+    def __init__(self, owner: str, label: str, payload: dict, concurrency: int = None):
+        self.id = uuid.uuid4().hex
+        self.owner = owner
+        self.label = label
+        self.payload = payload
+        self.status = QUEUED
+        self.result = None  # {"status_code": int, "doc": dict | None, "text": str}
+        self.error = None
+        self.attempts = 0
+        self.submitted_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.concurrency = concurrency  # set for batch jobs: their own limit of simultaneous analyses
+
+    @property
+    def active(self) -> bool:
+        return self.status in (QUEUED, RUNNING)
+
+    @property
+    def elapsed(self) -> float:
+        start = self.started_at or self.submitted_at
+        return (self.finished_at or time.time()) - start
+
+
+def run_analysis(client, token: str, payload: dict) -> dict:
+    """Ejecuta /start_process. Si el backend acepta trabajos (202), sondea /process_status hasta terminar."""
+    resp = client.submit_process(token, payload)
+    if resp.status_code == 202:
+        job_id = resp.json().get("job_id")
+        deadline = time.time() + ANALYSIS_JOB_DEADLINE
+        while time.time() < deadline:
+            time.sleep(ANALYSIS_POLL_INTERVAL)
+            resp = client.process_status(token, job_id)
+            if resp.status_code != 200:
+                break
+            status = resp.json()
+            if status.get("status") == DONE:
+                return {"status_code": 200, "doc": status.get("result"), "text": ""}
+            if status.get("status") == FAILED:
+                return {"status_code": status.get("status_code", 500), "doc": None, "text": status.get("detail", "")}
+        else:
+            raise Timeout(f"El trabajo {job_id} no terminó en {ANALYSIS_JOB_DEADLINE} s")
+
+    try:
+        doc = resp.json()
+    except ValueError:
+        doc = None
+    return {"status_code": resp.status_code, "doc": doc, "text": resp.text}
+
+
+class JobManager:
+    """Ejecuta análisis en segundo plano; las sesiones solo guardan el id del trabajo y consultan su estado."""
+
+    def __init__(self, max_workers: int):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="analysis")
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, client, token: str, owner: str, label: str, payload: dict) -> str:
+        job = Job(owner, label, payload)
+        with self._lock:
+            self._prune()
+            self._jobs[job.id] = job
+        self._start(job, client, token)
+        return job.id
+
+    def submit_batch(self, client, token: str, owner: str, items, concurrency: int = BATCH_CONCURRENCY) -> list:
+        """Lanza varios análisis (lista de (label, payload)) con su propio límite de concurrencia."""
+        jobs = [Job(owner, label, payload, concurrency) for label, payload in items]
+        if not jobs:
+            return []
+        with self._lock:
+            self._prune()
+            for job in jobs:
+                self._jobs[job.id] = job
+        self._run_batch(jobs, client, token, concurrency)
+        return [job.id for job in jobs]
+
+    def retry(self, job_id: str, client, token: str) -> bool:
+        job = self.get(job_id)
+        if job is None or job.active:
+            return False
+        if job.concurrency:
+            return bool(self.retry_batch([job_id], client, token))
+        self._reset(job)
+        self._start(job, client, token)
+        return True
+
+    def retry_batch(self, job_ids, client, token: str) -> list:
+        """Vuelve a lanzar trabajos terminados de un lote con la concurrencia elegida para ese lote."""
+        jobs = [job for job in map(self.get, job_ids) if job is not None and not job.active]
+        if not jobs:
+            return []
+        for job in jobs:
+            self._reset(job)
+        self._run_batch(jobs, client, token, max(job.concurrency or BATCH_CONCURRENCY for job in jobs))
+        return [job.id for job in jobs]
+
+    @staticmethod
+    def _reset(job: Job):
+        job.status, job.result, job.error = QUEUED, None, None
+        job.submitted_at, job.started_at, job.finished_at = time.time(), None, None
+
+    def _run_batch(self, jobs: list, client, token: str, concurrency: int):
+        executor = ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(jobs))), thread_name_prefix="analysis-batch")
+        for job in jobs:
+            executor.submit(self._run, job, client, token)
+        executor.shutdown(wait=False)  # queued jobs still run; threads exit once the batch is drained
+
+    def _prune(self):
+        cutoff = time.time() - JOB_RETENTION_SECONDS
+        for job_id in [j.id for j in self._jobs.values() if not j.active and j.finished_at < cutoff]:
+            del self._jobs[job_id]
+
+    def _start(self, job: Job, client, token: str):
+        self._executor.submit(self._run, job, client, token)
+
+    def _run(self, job: Job, client, token: str):
+        job.status = RUNNING
+        job.started_at = time.time()
+        job.attempts += 1
+        result, error = None, None
+        try:
+            result = run_analysis(client, token, job.payload)
+            if result["status_code"] != 200:
+                error = f"Error {result['status_code']}: {result['text']}"
+        except Timeout:
+            error = "La solicitud de análisis tardó demasiado tiempo (timeout)."
+        except RequestException as e:
+            error = f"Error de conexión durante el análisis: {e}"
+        except Exception as e:
+            # e.g. an unexpected response shape; the job must still leave RUNNING so polling stops
+            result, error = None, f"Error inesperado durante el análisis: {e}"
+        # finished_at goes first: readers (pruning, batch summary) rely on every inactive job having one
+        job.result, job.error = result, error
+        job.finished_at = time.time()
+        job.status = FAILED if error else DONE
+
+    def get(self, job_id: str):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def forget(self, job_id: str):
+        with self._lock:
+            self._jobs.pop(job_id, None)
+
+
+@st.cache_resource
+def get_job_manager() -> JobManager:
+    return JobManager(ANALYSIS_WORKERS)
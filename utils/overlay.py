@@ -0,0 +1,106 @@
+# frontend/utils/overlay.py
+"""Overlay de segmentación dibujado en el cliente a partir de `segmentation_result`.
+
+El backend devuelve la geometría del modelo (formato Roboflow: predicciones con `points` en píxeles de la
+imagen de entrada). Dibujarla sobre la original que ya tenemos, a resolución de pantalla, evita descargar
+un segundo JPEG por imagen. El resultado se guarda en la caché de imágenes como variante segmentada.
+"""
+import json
+import os
+
+import numpy as np
+
+from utils import perf
+from utils.image_cache import ORIGINAL, SEGMENTED, get_image_cache
+
+# Render overlays locally and ask the backend not to send its own (include_overlay=false)
+CLIENT_OVERLAY = os.getenv("CLIENT_OVERLAY", "1").lower() in ("1", "true", "yes")
+# Longest edge of the rendered overlay; cards show images at a fraction of this
+OVERLAY_MAX_EDGE = int(os.getenv("OVERLAY_MAX_EDGE", "800"))
+OVERLAY_COLOR = (0, 255, 0)
+OVERLAY_ALPHA = 0.35
+
+
+def parse_segmentation(segmentation):
+    """(tamaño de referencia o None, lista de polígonos Nx2) de un resultado de segmentación."""
+    if isinstance(segmentation, str):
+        try:
+            segmentation = json.loads(segmentation)
+        except ValueError:
+            return None, []
+    if not isinstance(segmentation, dict):
+        return None, []
+
+    image = segmentation.get("image") or {}
+    size = (float(image["width"]), float(image["height"])) if image.get("width") and image.get("height") else None
+    polygons = []
+    for pred in segmentation.get("predictions") or []:
+        points = pred.get("points")
+        if points:
+            polygon = np.array([[p["x"], p["y"]] for p in points], dtype=np.float64)
+        elif all(k in pred for k in ("x", "y", "width", "height")):
+            # Detection without a mask: outline its bounding box
+            cx, cy, half_w, half_h = pred["x"], pred["y"], pred["width"] / 2, pred["height"] / 2
+            polygon = np.array([[cx - half_w, cy - half_h], [cx + half_w, cy - half_h],
+                                [cx + half_w, cy + half_h], [cx - half_w, cy + half_h]], dtype=np.float64)
+        else:
+            continue
+        if len(polygon) >= 3:
+            polygons.append(polygon)
+    return size, polygons
+
+
+def has_geometry(segmentation) -> bool:
+    return bool(parse_segmentation(segmentation)[1])
+
+
+@perf.timed_fn("render overlay")
+def render_overlay(original, segmentation, max_edge: int = OVERLAY_MAX_EDGE):
+    """Copia reducida de `original` con los polígonos rellenos y contorneados; None si no hay geometría."""
+    from PIL import Image, ImageDraw
+
+    size, polygons = parse_segmentation(segmentation)
+    if not polygons:
+        return None
+    display = original.convert("RGB")  # always a copy, the cached original is left untouched
+    source_size = size or display.size  # coordinates refer to the image the model received
+    display.thumbnail((max_edge, max_edge))
+    scale = np.array(display.size, dtype=np.float64) / np.array(source_size, dtype=np.float64)
+
+    outlines = [[tuple(p) for p in polygon * scale] for polygon in polygons]
+    mask = Image.new("L", display.size, 0)
+    mask_draw = ImageDraw.Draw(mask)
+    for xy in outlines:
+        mask_draw.polygon(xy, fill=int(255 * OVERLAY_ALPHA))
+    display = Image.composite(Image.new("RGB", display.size, OVERLAY_COLOR), display, mask)
+
+    draw = ImageDraw.Draw(display)
+    width = max(2, max(display.size) // 200)
+    for xy in outlines:
+        draw.line(xy + [xy[0]], fill=OVERLAY_COLOR, width=width, joint="curve")
+    return display
+
+
+def overlay_from_image(image_id: str, original, segmentation):
+    """Overlay cacheado por image_id (sin caché si no hay id); None si no hay geometría."""
+    if not has_geometry(segmentation):
+        return None
+    if not image_id:
+        return render_overlay(original, segmentation)
+    return get_image_cache().get_or_load(image_id, SEGMENTED, lambda: render_overlay(original, segmentation))
+
+
+def overlay_from_bytes(image_id: str, data: bytes, segmentation):
+    """Overlay a partir de los bytes ya subidos (página de subida)."""
+    if not has_geometry(segmentation):
+        return None
+    cache = get_image_cache()
+    cached = cache.get(image_id, SEGMENTED) if image_id else None
+    if cached is not None:
+        return cached
+    from utils.images import decode_image_bytes
+
+    original = decode_image_bytes(data)
+    if image_id:
+        cache.put(image_id, ORIGINAL, original)
+    return overlay_from_image(image_id, original, segmentation)
@@ -0,0 +1,145 @@
+# frontend/utils/perf.py
+"""Instrumentación ligera por rerun: tiempos y bytes de llamadas al backend, decodificación, gráficos y render.
+
+Se activa con MELIA_PERF=1. Con la variable apagada, `timed()` devuelve un contexto vacío compartido y
+el coste es una llamada a función. MELIA_PERF_LOG=/ruta/perf.jsonl exporta cada rerun como una línea JSON.
+"""
+import functools
+import json
+import os
+import threading
+import time
+
+ENABLED = os.getenv("MELIA_PERF", "").lower() in ("1", "true", "yes")
+LOG_PATH = os.getenv("MELIA_PERF_LOG")
+
+_local = threading.local()
+_log_lock = threading.Lock()
+
+
+class Recorder:
+    """Mediciones de un rerun de una página."""
+
+    def __init__(self, page: str):
+        self.page = page
+        self.started = time.time()
+        self.records = []
+        self._lock = threading.Lock()
+
+    def add(self, section: str, seconds: float, nbytes: int):
+        with self._lock:
+            self.records.append({"section": section, "ms": seconds * 1000, "bytes": nbytes})
+
+    def summary(self) -> list:
+        """Agrupa por sección: número de llamadas, tiempo total y bytes."""
+        grouped = {}
+        with self._lock:
+            for record in self.records:
+                row = grouped.setdefault(record["section"], {"section": record["section"], "count": 0, "ms": 0.0, "bytes": 0})
+                row["count"] += 1
+                row["ms"] += record["ms"]
+                row["bytes"] += record["bytes"] or 0
+        return sorted(grouped.values(), key=lambda row: row["ms"], reverse=True)
+
+
+class _Timer:
+    def __init__(self, recorder: Recorder, section: str, nbytes: int):
+        self.recorder = recorder
+        self.section = section
+        self.nbytes = nbytes or 0
+
+    def add_bytes(self, nbytes: int):
+        self.nbytes += nbytes
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.recorder.add(self.section, time.perf_counter() - self.start, self.nbytes)
+        return False
+
+
+class _NoopTimer:
+    def add_bytes(self, nbytes: int):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NOOP = _NoopTimer()
+
+
+def current():
+    return getattr(_local, "recorder", None)
+
+
+def start_rerun(page: str):
+    """Empieza una nueva medición; llamar al inicio de cada página."""
+    if ENABLED:
+        _local.recorder = Recorder(page)
+
+
+def timed(section: str, nbytes: int = None):
+    """Context manager que mide una sección del rerun actual (no hace nada si la instrumentación está apagada)."""
+    recorder = current() if ENABLED else None
+    if recorder is None:
+        return _NOOP
+    return _Timer(recorder, section, nbytes)
+
+
+def timed_fn(section: str):
+    """Decorador equivalente a `with timed(section)`."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with timed(section):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def wrap(fn):
+    """Propaga el rerun actual a `fn` cuando se ejecuta en otro hilo (ThreadPoolExecutor)."""
+    recorder = current() if ENABLED else None
+    if recorder is None:
+        return fn
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        previous = current()
+        _local.recorder = recorder
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _local.recorder = previous
+    return wrapper
+
+
+def render_panel():
+    """Panel 'Rendimiento' en la barra lateral y exportación JSONL; llamar al final de cada página."""
+    recorder = current() if ENABLED else None
+    if recorder is None:
+        return
+    import streamlit as st
+
+    rows = recorder.summary()
+    total_ms = (time.time() - recorder.started) * 1000
+    with st.sidebar.expander("⏱️ Rendimiento", expanded=False):
+        st.caption(f"{recorder.page} · rerun de {total_ms:.0f} ms")
+        st.dataframe(
+            [{"Sección": r["section"], "Llamadas": r["count"], "ms": round(r["ms"], 1), "KB": round(r["bytes"] / 1024, 1)} for r in rows],
+            use_container_width=True,
+            hide_index=True,
+        )
+        from utils.image_cache import get_image_cache
+        st.caption("Caché de imágenes: " + ", ".join(f"{k}={v}" for k, v in get_image_cache().stats().items()))
+
+    if LOG_PATH:
+        line = json.dumps({"page": recorder.page, "ts": recorder.started, "total_ms": total_ms, "records": recorder.records})
+        with _log_lock, open(LOG_PATH, "a") as f:
+            f.write(line + "\n")
@@ -0,0 +1,50 @@
+# frontend/utils/preprocess.py
+import os
+from io import BytesIO
+
+from utils import perf
+
+# Longest edge actually used by the segmentation model; larger photos are downscaled here
+UPLOAD_MAX_EDGE = int(os.getenv("UPLOAD_MAX_EDGE", "1024"))
+UPLOAD_FORMAT = os.getenv("UPLOAD_FORMAT", "JPEG").upper()  # JPEG or WEBP
+UPLOAD_QUALITY = int(os.getenv("UPLOAD_QUALITY", "85"))
+
+_MIME_TYPES = {"JPEG": ("image/jpeg", ".jpg"), "WEBP": ("image/webp", ".webp")}
+
+
+@perf.timed_fn("normalize upload")
+def normalize_image(data: bytes, filename: str = "image", max_edge: int = UPLOAD_MAX_EDGE,
+                    fmt: str = UPLOAD_FORMAT, quality: int = UPLOAD_QUALITY) -> dict:
+    """Aplica la orientación EXIF, reduce el tamaño, elimina metadatos y recodifica la imagen."""
+    from PIL import Image, ImageOps  # deferred until a file is actually normalized
+
+    mime, ext = _MIME_TYPES[fmt]
+    img = Image.open(BytesIO(data))
+    img = ImageOps.exif_transpose(img)
+    if img.mode != "RGB":
+        img = img.convert("RGB")
+    img.thumbnail((max_edge, max_edge), Image.LANCZOS)
+
+    out = BytesIO()
+    # No exif/icc arguments are passed, so the encoded file carries no metadata
+    if fmt == "JPEG":
+        img.save(out, format=fmt, quality=quality, optimize=True, progressive=True)
+    else:
+        img.save(out, format=fmt, quality=quality, method=4)
+    encoded = out.getvalue()
+
+    return {
+        "data": encoded,
+        "mime": mime,
+        "filename": os.path.splitext(filename)[0] + ext,
+        "size": img.size,
+        "original_bytes": len(data),
+        "bytes": len(encoded),
+    }
+
+
+def format_bytes(n: int) -> str:
+    for unit in ("B", "KB", "MB"):
+        if n < 1024 or unit == "MB":
+            return f"{n:.0f} {unit}" if unit == "B" else f"{n:.1f} {unit}"
+        n /= 1024
@@ -0,0 +1,76 @@
+# frontend/utils/session.py
+"""Sesión del usuario: caducidad del JWT leída localmente y renovación antes de que expire.
+
+El token no se verifica aquí (eso lo hace el backend); solo se lee `exp` y `sub` del payload para saber
+cuándo renovarlo y a qué usuario pertenece. Las cachés se indexan por usuario, así que renovar el token
+no descarta los datos ya cacheados.
+"""
+import base64
+import json
+import os
+import time
+
+import streamlit as st
+
+# Refresh the access token when it has less than this many seconds left
+TOKEN_REFRESH_MARGIN = int(os.getenv("TOKEN_REFRESH_MARGIN", "120"))
+
+
+def token_claims(token: str) -> dict:
+    """Payload de un JWT sin verificar la firma; {} si el token no es un JWT."""
+    try:
+        payload = token.split(".")[1]
+        claims = json.loads(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))
+    except (AttributeError, IndexError, ValueError):
+        return {}
+    return claims if isinstance(claims, dict) else {}
+
+
+def token_expiry(token: str):
+    """Instante de expiración (epoch) o None si el token no la declara."""
+    exp = token_claims(token).get("exp")
+    return float(exp) if isinstance(exp, (int, float)) else None
+
+
+def end_session(client, purge: bool = False):
+    """Cierra la sesión; con `purge` también borra los datos cacheados del usuario (botón 'Cerrar Sesión')."""
+    token = st.session_state.get("access_token")
+    if token:
+        if purge:
+            client.logout(token)
+        else:
+            client.forget_token(token)
+    st.session_state["access_token"] = None
+    st.session_state["logged_in_user"] = None
+
+
+def active_token(client):
+    """Token vigente de la sesión, renovado si está por expirar. None si no hay sesión o ya expiró."""
+    token = st.session_state.get("access_token")
+    if not token:
+        return None
+    # A background request may already have renewed it after a 401
+    token = client.current_token(token)
+    expires = token_expiry(token)
+    if expires is not None and expires - time.time() < TOKEN_REFRESH_MARGIN:
+        renewed = client.refresh_session(token)
+        if renewed:
+            token = renewed
+        elif expires <= time.time():
+            end_session(client)
+            st.session_state["session_expired"] = True
+            return None
+    st.session_state["access_token"] = token
+    return token
+
+
+def require_login(client, message: str = "Necesitas iniciar sesión para acceder a esta página."):
+    """Devuelve el token vigente o detiene la página con un aviso."""
+    token = active_token(client)
+    if token is None:
+        if st.session_state.pop("session_expired", False):
+            st.warning("Tu sesión expiró. Vuelve a iniciar sesión; tus datos en caché se conservan.")
+        else:
+            st.warning(message)
+        st.stop()
+    return token
@@ -0,0 +1,67 @@
+# frontend/utils/startup.py
+"""Arranque del proceso: configuración y CSS leídos una sola vez y precalentamiento opcional.
+
+Con MELIA_WARMUP=1, la primera sesión que abre cualquier página lanza en segundo plano la importación de
+los módulos pesados (PIL, pandas, plotly) y crea los recursos compartidos, de modo que el primer usuario
+que entra en Historial o Subir no paga el arranque en frío.
+"""
+import importlib
+import os
+import threading
+
+import streamlit as st
+from dotenv import load_dotenv
+
+WARMUP_ENABLED = os.getenv("MELIA_WARMUP", "").lower() in ("1", "true", "yes")
+# Modules imported lazily by the pages; warm-up imports them ahead of the first render that needs them
+WARMUP_MODULES = ("PIL.Image", "PIL.ImageOps", "pandas", "plotly.express",
+                  "utils.analysis_frame", "utils.timeline_chart", "utils.images", "utils.preprocess")
+
+
+@st.cache_resource(show_spinner=False)
+def load_config() -> bool:
+    """Carga .env una vez por proceso (os.environ es global, no hace falta repetirlo en cada rerun)."""
+    return load_dotenv()
+
+
+@st.cache_resource(show_spinner=False)
+def _read_text(file_name: str) -> str:
+    try:
+        with open(file_name) as f:
+            return f.read()
+    except OSError:
+        return ""
+
+
+def load_css(file_name: str):
+    css = _read_text(file_name)
+    if css:
+        st.markdown(f"<style>{css}</style>", unsafe_allow_html=True)
+
+
+def _import_modules(modules):
+    for name in modules:
+        try:
+            importlib.import_module(name)
+        except Exception:
+            pass  # a missing optional module only means its page pays the import later
+
+
+@st.cache_resource(show_spinner=False)
+def warm_up():
+    """Precalienta el proceso una sola vez; devuelve el hilo de importación (o None si está desactivado)."""
+    if not WARMUP_ENABLED:
+        return None
+    # Shared resources are cheap to create but need the script context, so build them here
+    from utils.api_client import get_client
+    from utils.disk_cache import get_disk_cache
+    from utils.image_cache import get_image_cache
+    from utils.jobs import get_job_manager
+
+    get_client()
+    get_image_cache()
+    get_disk_cache()
+    get_job_manager()
+    thread = threading.Thread(target=_import_modules, args=(WARMUP_MODULES,), name="melia-warmup", daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,89 @@
+# frontend/utils/timeline_chart.py
+"""Gráfico 'Evolución Temporal de Análisis' escalable: WebGL sobre un umbral y agregación por día/semana."""
+import hashlib
+import os
+
+import pandas as pd
+import streamlit as st
+
+from utils import perf
+
+# Above this many points the scatter is drawn with WebGL (scattergl)
+SCATTERGL_THRESHOLD = int(os.getenv("TIMELINE_SCATTERGL_THRESHOLD", "500"))
+# Above this many points they are pre-aggregated per period and body part
+AGGREGATE_THRESHOLD = int(os.getenv("TIMELINE_AGGREGATE_THRESHOLD", "2000"))
+# Ranges longer than this are aggregated per week instead of per day
+WEEKLY_AFTER_DAYS = int(os.getenv("TIMELINE_WEEKLY_AFTER_DAYS", "180"))
+
+CHART_COLUMNS = ["analysis_date", "confidence", "classification", "body_part"]
+LABELS = {
+    'analysis_date': 'Fecha de Análisis',
+    'confidence': 'Nivel de Confianza',
+    'classification': 'Nivel de Riesgo',
+    'body_part': 'Parte del Cuerpo',
+    'count': 'Análisis',
+    'max_confidence': 'Confianza máxima',
+}
+
+
+def frame_fingerprint(frame: pd.DataFrame) -> str:
+    """Huella de los datos que dibuja el gráfico (cambia si cambia cualquier punto)."""
+    hashed = pd.util.hash_pandas_object(frame[CHART_COLUMNS], index=False).values
+    return hashlib.sha1(hashed.tobytes()).hexdigest()
+
+
+def chart_mode(frame: pd.DataFrame) -> str:
+    """'svg', 'webgl', 'daily' o 'weekly' según el número de puntos y el rango de fechas."""
+    if len(frame) <= SCATTERGL_THRESHOLD:
+        return "svg"
+    if len(frame) <= AGGREGATE_THRESHOLD:
+        return "webgl"
+    span = frame["analysis_date"].max() - frame["analysis_date"].min()
+    return "weekly" if span.days > WEEKLY_AFTER_DAYS else "daily"
+
+
+def aggregate(frame: pd.DataFrame, freq: str) -> pd.DataFrame:
+    """Cuenta y confianza media/máxima por periodo, parte del cuerpo y clasificación."""
+    grouped = frame.groupby(
+        [pd.Grouper(key="analysis_date", freq=freq), "body_part", "classification"], observed=True
+    )["confidence"]
+    return grouped.agg(count="size", confidence="mean", max_confidence="max").reset_index()
+
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def _build_figure(fingerprint: str, mode: str, _frame: pd.DataFrame):
+    """Construye la figura; cacheada por huella de datos para que los reruns no la reconstruyan.
+
+    cache_data devuelve una copia en cada llamada: la figura es mutable y no debe compartirse entre sesiones.
+    """
+    import plotly.express as px  # deferred: plotly is only needed once there is something to draw
+
+    title = "Evolución Temporal de Análisis"
+    if mode in ("daily", "weekly"):
+        data = aggregate(_frame, "D" if mode == "daily" else "W")
+        return px.scatter(data,
+                          x='analysis_date',
+                          y='confidence',
+                          size='count',
+                          color='classification',
+                          symbol='body_part',
+                          hover_data=['count', 'max_confidence'],
+                          render_mode='webgl',
+                          title=f"{title} (agregado por {'día' if mode == 'daily' else 'semana'})",
+                          labels={**LABELS, 'confidence': 'Confianza media'})
+    return px.scatter(_frame[CHART_COLUMNS],
+                      x='analysis_date',
+                      y='confidence',
+                      color='classification',
+                      symbol='body_part',
+                      render_mode='webgl' if mode == "webgl" else 'svg',
+                      title=title,
+                      labels=LABELS)
+
+
+def timeline_figure(frame: pd.DataFrame):
+    with perf.timed("timeline fingerprint"):
+        fingerprint = frame_fingerprint(frame)
+    mode = chart_mode(frame)
+    with perf.timed("px.scatter"):
+        return _build_figure(fingerprint, mode, frame)
@@ -0,0 +1,33 @@
+# frontend/utils/uploads.py
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from utils import perf
+from utils.api_client import RequestException
+
+# Max number of files sent to /upload_image at the same time
+UPLOAD_CONCURRENCY = int(os.getenv("UPLOAD_CONCURRENCY", "3"))
+
+
+def upload_one(client, token: str, files: dict, data: dict) -> dict:
+    """Sube una imagen. Nunca lanza excepciones: el error va en el resultado."""
+    try:
+        resp = client.upload_image(token, files, data)
+    except RequestException as e:
+        return {"status_code": None, "json": None, "error": f"Error al conectar con el servidor: {e}"}
+    try:
+        body = resp.json()
+    except ValueError:
+        body = None
+    # The 200 body carries the base64 overlay; only keep the raw text for errors
+    return {"status_code": resp.status_code, "json": body, "text": "" if resp.status_code == 200 else resp.text}
+
+
+def upload_many(client, token: str, items: dict, max_workers: int = UPLOAD_CONCURRENCY):
+    """Sube varias imágenes en paralelo ({clave: (files, data)}) y devuelve (clave, resultado) a medida que terminan."""
+    if not items:
+        return
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(items)))) as executor:
+        futures = {executor.submit(perf.wrap(upload_one), client, token, files, data): key for key, (files, data) in items.items()}
+        for future in as_completed(futures):
+            yield futures[future], future.result()